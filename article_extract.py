@@ -0,0 +1,244 @@
+import re
+from html.parser import HTMLParser
+
+# --- ARTICLE EXTRACTION ---
+# The extractor is a streaming, callback-based parser (no DOM is built): it
+# scores the blocks that hold paragraphs readability-style and stops once the
+# best-scoring block so far has enough text for the caller's budget and is
+# marked as content (<article>, <main> or a class/id such as "story"); an
+# unmarked block could still be a sidebar ahead of the article. Pages that keep
+# their body text directly in <div>s (or split it with <br>) have no such
+# blocks; for those the direct text of each container is scored the same way as
+# a fallback. List items only count inside a container that already has
+# paragraphs, so related-story and footer lists don't outscore the article
+# body.
+
+BLOCK_TAGS = {'p', 'li', 'blockquote', 'pre', 'h2', 'h3', 'h4'}
+SKIP_TAGS = {'script', 'style', 'noscript', 'nav', 'footer', 'header', 'aside', 'form', 'svg', 'iframe', 'template'}
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+# Tags inside running text; they don't end a piece of a container's direct text
+LIST_TAGS = {'ul', 'ol', 'dl'}
+INLINE_TAGS = {'a', 'abbr', 'b', 'cite', 'code', 'em', 'font', 'i', 'mark', 'q', 's', 'small', 'span',
+               'strong', 'sub', 'sup', 'time', 'u'}
+
+POSITIVE_RE = re.compile(r'article|body|content|entry|main|post|story|text', re.I)
+NEGATIVE_RE = re.compile(r'ad-|ads|banner|comment|cookie|footer|menu|modal|nav|newsletter|promo|related|share|sidebar|social|sponsor|subscribe|widget', re.I)
+
+MIN_PARAGRAPH_CHARS = 25
+# Below this the paragraph-based result loses to a longer direct-text fallback
+MIN_BLOCK_TEXT_CHARS = 200
+
+
+class _Container:
+    __slots__ = ('weight', 'score', 'paragraphs', 'chars', 'link_chars')
+
+    def __init__(self, weight):
+        self.weight = weight
+        self.score = 0.0
+        self.paragraphs = []
+        self.chars = 0
+        self.link_chars = 0
+
+
+class ArticleExtractor(HTMLParser):
+    """
+    Incremental extractor: feed() HTML chunks as they arrive, then call result().
+    `done` turns True once the best-scoring block so far is marked as content
+    and holds `max_chars` characters; feeding more after that is a no-op, so
+    callers can stop downloading.
+    """
+
+    def __init__(self, max_chars=None):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.done = False
+        self.title = ''
+        self._stack = []          # (tag, weight, node id) per open element
+        self._next_id = 0
+        self._skip_depth = 0
+        self._in_title = False
+        self._block = None        # text parts of the paragraph being read
+        self._block_tag = None
+        self._block_links = 0
+        self._link_depth = 0
+        self._containers = {}
+        self._loose = []          # direct container text outside paragraph blocks
+        self._loose_links = 0
+        self._loose_containers = {}
+
+    # -- parser callbacks --
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag not in INLINE_TAGS:
+            self._end_loose()
+        if tag in VOID_TAGS:
+            return
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        if tag == 'title':
+            self._in_title = True
+        if tag in BLOCK_TAGS:
+            self._end_block()
+            self._block = []
+            self._block_tag = tag
+            self._block_links = 0
+        if tag == 'a':
+            self._link_depth += 1
+        attrs = dict(attrs)
+        hint = f"{attrs.get('class') or ''} {attrs.get('id') or ''}"
+        weight = 0
+        if POSITIVE_RE.search(hint):
+            weight += 25
+        if NEGATIVE_RE.search(hint):
+            weight -= 25
+        if tag in ('article', 'main'):
+            weight += 25
+        self._next_id += 1
+        self._stack.append((tag, weight, self._next_id))
+
+    def handle_endtag(self, tag):
+        if self.done or tag in VOID_TAGS:
+            return
+        if tag not in INLINE_TAGS:
+            self._end_loose()
+        if tag in BLOCK_TAGS:
+            self._end_block()
+        if tag == 'title':
+            self._in_title = False
+        if tag == 'a' and self._link_depth:
+            self._link_depth -= 1
+        # Pop up to the matching open tag; tolerates unclosed <p>, <li>, etc.
+        for i in range(len(self._stack) - 1, -1, -1):
+            if self._stack[i][0] == tag:
+                # An unclosed paragraph ends with its container: score it while
+                # the container is still on the stack
+                if any(open_tag in BLOCK_TAGS for open_tag, _, _ in self._stack[i + 1:]):
+                    self._end_block()
+                for open_tag, _, _ in self._stack[i:]:
+                    if open_tag in SKIP_TAGS:
+                        self._skip_depth -= 1
+                del self._stack[i:]
+                break
+
+    def handle_data(self, data):
+        if self.done:
+            return
+        if self._in_title:
+            self.title += data
+            return
+        if self._skip_depth:
+            return
+        if self._block is None:
+            self._loose.append(data)
+            if self._link_depth:
+                self._loose_links += len(data)
+            return
+        self._block.append(data)
+        if self._link_depth:
+            self._block_links += len(data)
+
+    # -- scoring --
+
+    def _end_block(self):
+        if self._block is None:
+            return
+        text = ' '.join(''.join(self._block).split())
+        link_chars = self._block_links
+        self._block = None
+        self._add_paragraph(text, link_chars, self._containers, list_item=self._block_tag == 'li')
+
+    def _end_loose(self):
+        """Ends a piece of direct text (at <br> or a non-inline tag) and scores it for the fallback."""
+        if not self._loose:
+            return
+        text = ' '.join(''.join(self._loose).split())
+        link_chars = self._loose_links
+        self._loose = []
+        self._loose_links = 0
+        self._add_paragraph(text, link_chars, self._loose_containers, loose=True)
+
+    def _add_paragraph(self, text, link_chars, containers, loose=False, list_item=False):
+        """
+        Scores one paragraph into its parent and grandparent containers. Loose
+        text is kept in both, since a <div> holding a single paragraph is that
+        paragraph; it never stops the download, as only pages without paragraph
+        blocks use it. A list item counts, at half score, for the container
+        around its list, and only if that container already holds paragraphs.
+        """
+        if len(text) < MIN_PARAGRAPH_CHARS or link_chars > len(text) * 0.5:
+            return
+
+        # Paragraph score, readability style: base point, commas, length bonus.
+        score = 1 + text.count(',') + min(len(text) // 100, 3)
+
+        # Credit the paragraph's parent fully and its grandparent by half.
+        skip = BLOCK_TAGS | INLINE_TAGS if loose else BLOCK_TAGS | LIST_TAGS if list_item else BLOCK_TAGS
+        ancestors = [i for i in range(len(self._stack) - 1, -1, -1) if self._stack[i][0] not in skip][:2]
+        if list_item:
+            parent = containers.get(self._stack[ancestors[0]][2]) if ancestors else None
+            if parent is None or not parent.paragraphs:
+                return
+            score /= 2
+        for rank, index in enumerate(ancestors):
+            _, weight, node_id = self._stack[index]
+            container = containers.get(node_id)
+            if container is None:
+                container = _Container(weight)
+                containers[node_id] = container
+            container.score += score if rank == 0 else score / 2
+            if rank == 0 or loose:
+                container.paragraphs.append(text)
+                container.chars += len(text) + 1
+                container.link_chars += link_chars
+                if (not loose and self.max_chars and container.weight > 0 and container.chars >= self.max_chars
+                        and _best(containers)[1] is container):
+                    self.done = True
+
+    def feed(self, data):
+        if not self.done:
+            super().feed(data)
+        return self.done
+
+    def result(self):
+        """Returns {'title', 'text', 'link_density'} for the best-scoring content block."""
+        if not self.done:
+            self.close()
+            self._end_block()
+            self._end_loose()
+        best = _best(self._containers)
+        if best is None or best[1].chars < MIN_BLOCK_TEXT_CHARS:
+            fallback = _best(self._loose_containers)
+            if fallback is not None and (best is None or fallback[1].chars > best[1].chars):
+                best = fallback
+        text = '\n'.join(best[1].paragraphs) if best else ''
+        # Share of the block's text that sits inside links (high for link lists and teasers)
+        link_density = round(best[1].link_chars / best[1].chars, 3) if best else 0.0
+        if self.max_chars:
+            text = text[:self.max_chars]
+        return {'title': ' '.join(self.title.split()), 'text': text, 'link_density': link_density}
+
+
+def _best(containers):
+    """(score, container) of the highest-scoring container that holds text, or None."""
+    best = None
+    for container in containers.values():
+        if not container.paragraphs:
+            continue
+        total = container.score + container.weight
+        if best is None or total > best[0]:
+            best = (total, container)
+    return best
+
+
+def extract_article(html, max_chars=None):
+    """Extracts {'title', 'text', 'link_density'} from a complete HTML document (str or bytes)."""
+    if isinstance(html, bytes):
+        html = html.decode('utf-8', errors='replace')
+    extractor = ArticleExtractor(max_chars=max_chars)
+    # Feed in slices so a long page stops being parsed once the budget is met.
+    for start in range(0, len(html), 65536):
+        if extractor.feed(html[start:start + 65536]):
+            break
+    return extractor.result()
@@ -0,0 +1,126 @@
+import json
+import os
+import re
+import threading
+import time
+from urllib.parse import urlparse
+
+from cache_config import CACHE_DIR
+
+# --- LOCAL ARTICLE PRE-FILTER ---
+# score_article rates a candidate from cheap local signals (paywall stubs,
+# cookie walls, listicles, press releases, near-empty pages score low); only
+# candidates at or above the threshold are sent to the AI editor. Every
+# decision is appended to a JSONL log so thresholds can be tuned offline.
+
+PREFILTER_THRESHOLD = float(os.getenv('PREFILTER_THRESHOLD', '0.5'))
+PREFILTER_LOG = os.getenv('PREFILTER_LOG', os.path.join(CACHE_DIR, 'prefilter_decisions.jsonl'))
+
+# Publishers whose articles are usually worth a look / usually not
+TRUSTED_SOURCES = {
+    'techcrunch.com', 'theverge.com', 'wired.com', 'arstechnica.com', 'technologyreview.com',
+    'venturebeat.com', 'reuters.com', 'zdnet.com', 'engadget.com', 'theregister.com',
+}
+LOW_VALUE_SOURCES = {
+    'prnewswire.com', 'globenewswire.com', 'businesswire.com', 'einpresswire.com',
+    'msn.com', 'yahoo.com', 'benzinga.com', 'fool.com',
+}
+
+# Phrases that mark a line as paywall / cookie / newsletter boilerplate
+BOILERPLATE_RE = re.compile(
+    r'subscribe|subscription|sign in|sign up|log in|already a subscriber|continue reading|'
+    r'create a free account|cookies?|consent|privacy policy|terms of (use|service)|'
+    r'all rights reserved|newsletter|advertisement|enable javascript',
+    re.I
+)
+PAYWALL_RE = re.compile(r'subscribe to (continue|read)|to continue reading|already a subscriber|for subscribers only', re.I)
+LOW_VALUE_TITLE_RE = re.compile(
+    r'^\s*(top\s+)?\d+\s+(best|ways|things|tips|reasons|tools|apps)\b|'
+    r'\bdeals?\b|\bcoupon|\bsponsored\b|\bhoroscope|\bquiz\b|\blive updates\b|\bhow to install\b|\bpress release\b',
+    re.I
+)
+
+MIN_TEXT_CHARS = 600
+
+
+def _domain_in(url, domains):
+    labels = (urlparse(url).hostname or '').lower().split('.')
+    return any('.'.join(labels[i:]) in domains for i in range(len(labels) - 1))
+
+
+def article_features(article):
+    """Cheap signals for an article dict with 'title', 'text', 'url' and optionally 'link_density'."""
+    text = article.get('text') or ''
+    lines = [line for line in text.splitlines() if line.strip()]
+    boilerplate = sum(len(line) for line in lines if BOILERPLATE_RE.search(line) and len(line) < 300)
+    return {
+        'chars': len(text),
+        'boilerplate_ratio': round(boilerplate / len(text), 3) if text else 1.0,
+        'link_density': article.get('link_density', 0.0),
+        'paywall': bool(PAYWALL_RE.search(text)),
+        'low_value_title': bool(LOW_VALUE_TITLE_RE.search(article.get('title') or '')),
+        'trusted_source': _domain_in(article.get('url', ''), TRUSTED_SOURCES),
+        'low_value_source': _domain_in(article.get('url', ''), LOW_VALUE_SOURCES),
+    }
+
+
+def score_article(article):
+    """Returns (score in 0..1, features, reasons) for a candidate article."""
+    f = article_features(article)
+    score = 0.6
+    reasons = []
+    if f['chars'] < MIN_TEXT_CHARS:
+        score -= 0.3 * (1 - f['chars'] / MIN_TEXT_CHARS)
+        reasons.append('short text')
+    if f['boilerplate_ratio'] > 0.2:
+        score -= min(0.4, f['boilerplate_ratio'])
+        reasons.append('boilerplate')
+    if f['link_density'] > 0.3:
+        score -= min(0.3, f['link_density'] - 0.3 + 0.1)
+        reasons.append('link heavy')
+    if f['paywall']:
+        score -= 0.4
+        reasons.append('paywall')
+    if f['low_value_title']:
+        score -= 0.25
+        reasons.append('listicle/promo title')
+    if f['low_value_source']:
+        score -= 0.25
+        reasons.append('low-value source')
+    if f['trusted_source']:
+        score += 0.2
+        reasons.append('trusted source')
+    return round(max(0.0, min(1.0, score)), 3), f, reasons
+
+
+_log_lock = threading.Lock()
+
+
+def log_decision(stage, article, passed, score=None, features=None, reasons=None):
+    """Appends one filter decision (pre-filter or AI) to the JSONL tuning log."""
+    record = {
+        'ts': round(time.time(), 3), 'stage': stage, 'url': article.get('url'), 'title': article.get('title'),
+        'passed': passed, 'score': score, 'features': features, 'reasons': reasons,
+    }
+    try:
+        with _log_lock:
+            os.makedirs(os.path.dirname(PREFILTER_LOG) or '.', exist_ok=True)
+            with open(PREFILTER_LOG, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    except OSError as e:
+        print(f"Could not write filter log: {e}")
+
+
+def prefilter(articles, threshold=None):
+    """Returns the articles that pass the local checks, in order; logs every decision."""
+    threshold = PREFILTER_THRESHOLD if threshold is None else threshold
+    passed = []
+    for article in articles:
+        score, features, reasons = score_article(article)
+        ok = score >= threshold
+        log_decision('prefilter', article, ok, score, features, reasons)
+        if ok:
+            passed.append(article)
+        else:
+            print(f"  > Pre-filter dropped ({score}: {', '.join(reasons)}): {article.get('title', '')[:50]}...")
+    return passed
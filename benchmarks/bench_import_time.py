@@ -0,0 +1,150 @@
+"""
+Cold-start benchmark: import time of the app and the bots.
+
+Usage:
+    python benchmarks/bench_import_time.py [module ...] [--runs N] [--budget-ms MS] [--top N]
+
+Each module is imported in a fresh interpreter with `python -X importtime`
+in the live configuration (LLM_BACKEND=live and a dummy GEMINI_API_KEY, which
+is never sent since nothing may call Gemini at import), the import tree is
+parsed and the best of --runs is compared with the module's budget. The script
+exits with status 1 when a module is over budget or loads one of the heavy
+dependencies that must stay lazy, so CI can catch cold-start regressions.
+Modules whose own dependencies are missing here (e.g. selenium) are skipped,
+but a missing lazy package counts as loaded: the import was attempted.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative import time budgets in ms; streamlit alone is most of the app's
+BUDGETS_MS = {
+    'linkedin_genius': 600,
+    'linkedin_bot': 175,
+    'linkedin_bot_auto': 175,
+    'linkedin_bot_pro': 175,
+    'linkedin_bot_selenium': 500,
+}
+DEFAULT_BUDGET_MS = 175
+
+# Only loaded on the code paths that need them, never at startup
+LAZY_PACKAGES = ('pandas', 'bs4', 'PIL', 'google.genai', 'google.generativeai', 'requests_oauthlib', 'asyncio')
+# Exceptions: streamlit pulls in asyncio (tornado) itself
+ALLOWED_EAGER = {'linkedin_genius': {'asyncio'}}
+
+LINE_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$')
+
+
+def parse_importtime(stderr):
+    """Returns [(depth, module, self_us, cumulative_us)] in the order Python printed them."""
+    rows = []
+    for line in stderr.splitlines():
+        match = LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((len(indent) // 2, name, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def target_tree(rows, module):
+    """The target's own row plus everything it imported (children are printed before their parent)."""
+    for i, (depth, name, _, _) in enumerate(rows):
+        if depth == 0 and name == module:
+            start = i
+            while start > 0 and rows[start - 1][0] > 0:
+                start -= 1
+            return rows[i], rows[start:i]
+    return None, []
+
+
+def lazy_package(name):
+    """The lazy package `name` belongs to (or is a parent of, e.g. 'google'), else None."""
+    for pkg in LAZY_PACKAGES:
+        if name == pkg or name.startswith(pkg + '.') or pkg.startswith(name + '.'):
+            return pkg
+    return None
+
+
+def missing_module(stderr):
+    """Name of the module an ImportError says is missing, e.g. 'google.genai', or None."""
+    missing = re.search(r"No module named '([^']+)'", stderr)
+    if missing:
+        return missing.group(1)
+    # `from google import genai` with only another google.* package installed
+    missing = re.search(r"cannot import name '(\w+)' from '([\w.]+)'", stderr)
+    if missing:
+        return f"{missing.group(2)}.{missing.group(1)}"
+    return None
+
+
+def measure(module):
+    """Returns (rows, note, failed); rows is None when the import didn't complete."""
+    # The app's draft prefetcher would start calling Gemini on a background
+    # thread during the import; an empty buffer keeps it idle
+    env = dict(os.environ, LLM_BACKEND='live', GEMINI_API_KEY='benchmark-dummy-key', DRAFT_BUFFER_SIZE='0',
+               CACHE_DIR=os.environ.get('CACHE_DIR', os.path.join(ROOT, '.cache')))
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                          cwd=ROOT, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        missing = missing_module(proc.stderr)
+        if missing and lazy_package(missing):
+            return None, f"FAILED: imports {lazy_package(missing)} at startup (not installed here)", True
+        if missing and missing.split('.')[0] != module:
+            return None, f"skipped (missing dependency '{missing}')", False
+        errors = '\n'.join(l for l in proc.stderr.splitlines() if not l.startswith('import time:'))
+        raise RuntimeError(f"import {module} failed:\n{errors[-2000:]}")
+    return parse_importtime(proc.stderr), None, False
+
+
+def eager_lazy_packages(module, children):
+    allowed = ALLOWED_EAGER.get(module, set())
+    loaded = {name for _, name, _, _ in children}
+    return sorted(pkg for pkg in LAZY_PACKAGES
+                  if pkg not in allowed and any(n == pkg or n.startswith(pkg + '.') for n in loaded))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('modules', nargs='*', default=list(BUDGETS_MS))
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--budget-ms', type=float, help="One budget for every module (overrides BUDGETS_MS)")
+    parser.add_argument('--top', type=int, default=5, help="Heaviest direct imports to list per module")
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        best = None
+        for _ in range(args.runs):
+            rows, note, import_failed = measure(module)
+            if rows is None:
+                break
+            root, children = target_tree(rows, module)
+            if best is None or root[3] < best[0][3]:
+                best = (root, children)
+        if rows is None:
+            print(f"{module:24} {note}")
+            failed = failed or import_failed
+            continue
+
+        (_, _, _, total_us), children = best
+        budget = args.budget_ms or BUDGETS_MS.get(module, DEFAULT_BUDGET_MS)
+        eager = eager_lazy_packages(module, children)
+        over = total_us / 1000 > budget
+        failed = failed or over or bool(eager)
+        status = 'OVER BUDGET' if over else 'ok'
+        print(f"{module:24} {total_us / 1000:8.1f} ms  (budget {budget:.0f} ms)  {status}")
+        direct = sorted((c for c in children if c[0] == 1), key=lambda c: -c[3])
+        for _, name, _, cumulative_us in direct[:args.top]:
+            print(f"    {name:28} {cumulative_us / 1000:8.1f} ms")
+        if eager:
+            print(f"    loaded at startup but should be lazy: {', '.join(eager)}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
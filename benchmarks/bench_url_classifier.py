@@ -0,0 +1,109 @@
+"""
+Micro-benchmark: url_classifier vs the old exclude_patterns/keywords loops.
+
+Usage:
+    python benchmarks/bench_url_classifier.py [page.html ...]
+    python benchmarks/bench_url_classifier.py --record "Nvidia earnings"
+
+Pages are Google News search pages saved to disk (--record saves one into
+benchmarks/pages/). Without arguments every page in benchmarks/pages/ is used,
+or a synthetic page when that folder is empty.
+
+No recorded pages are committed: benchmarks/pages/ is filled locally with
+--record. Out of the box the script therefore measures only the synthetic
+page, a generated mix of article, image, CDN and sign-up links shaped like a
+search page's; it is not a recording of real search results.
+"""
+import glob
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from url_classifier import EXCLUDE_PATTERNS, TECH_KEYWORDS, default_classifier
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pages')
+URL_RE = re.compile(r'https?://[^\s<>"]+', re.IGNORECASE)
+
+
+def legacy_select(https_urls, processed_urls):
+    """The loop linkedin_genius.fetch_article_content used before url_classifier."""
+    relevant_urls = []
+    seen_urls = set()
+    for url in https_urls:
+        if any(pattern in url.lower() for pattern in EXCLUDE_PATTERNS):
+            continue
+        if any(kw in url.lower() for kw in TECH_KEYWORDS):
+            clean_url = url.split('?')[0].split('#')[0].rstrip('/')
+            if clean_url not in seen_urls and clean_url not in processed_urls:
+                seen_urls.add(clean_url)
+                relevant_urls.append(url)
+    if not relevant_urls:
+        for url in https_urls:
+            if any(pattern in url.lower() for pattern in EXCLUDE_PATTERNS): continue
+            if '/read/' in url or 'articles' in url:
+                clean_url = url.split('?')[0].split('#')[0].rstrip('/')
+                if clean_url not in seen_urls and clean_url not in processed_urls:
+                    relevant_urls.append(url)
+    return relevant_urls
+
+
+def synthetic_page(n=5000, seed=7):
+    rng = random.Random(seed)
+    hosts = ['www.techcrunch.com', 'lh3.googleusercontent.com', 'www.gstatic.com', 'news.google.com',
+             'www.theverge.com', 'finance.yahoo.com', 'cdn.example.b-cdn.net', 'www.reuters.com']
+    paths = ['/2026/10/ai-chips-{}', '/articles/CBMi{}', '/images/thumb-{}.png', '/read/CBMi{}',
+             '/business/markets-{}', '/story/robotics-startup-{}', '/signup?ref={}', '/world/{}']
+    return ' '.join(
+        f'<a href="https://{rng.choice(hosts)}{rng.choice(paths).format(i)}">x</a>' for i in range(n)
+    )
+
+
+def record(query):
+    import http_client
+    os.makedirs(PAGES_DIR, exist_ok=True)
+    url = f"https://news.google.com/search?q={query.replace(' ', '+')}&hl=en-US&gl=US&ceid=US:en"
+    html = http_client.get(url, timeout=15).text
+    path = os.path.join(PAGES_DIR, re.sub(r'\W+', '_', query).strip('_') + '.html')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(html)
+    print(f"Saved {path} ({len(html)} chars)")
+
+
+def bench(fn, urls, processed, repeat=20):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(urls, processed)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv):
+    if argv[:1] == ['--record']:
+        record(' '.join(argv[1:]))
+        return 0
+
+    paths = argv or sorted(glob.glob(os.path.join(PAGES_DIR, '*.html')))
+    pages = [(p, open(p, encoding='utf-8').read()) for p in paths] or [('<synthetic>', synthetic_page())]
+
+    for name, html in pages:
+        urls = URL_RE.findall(html)
+        processed = set()
+        old = legacy_select(urls, processed)
+        new = default_classifier.select(urls, processed)
+        # The classifier also de-duplicates Panic Mode links, so compare distinct URLs.
+        same = list(dict.fromkeys(old)) == new
+        t_old = bench(legacy_select, urls, processed)
+        t_new = bench(default_classifier.select, urls, processed)
+        print(f"{os.path.basename(name)}: {len(urls)} urls, {len(new)} selected, "
+              f"legacy {t_old * 1000:.2f} ms, classifier {t_new * 1000:.2f} ms, "
+              f"speedup x{t_old / t_new:.1f}, same result: {same}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,14 @@
+import os
+
+# --- CACHE LOCATION ---
+# One directory holds every on-disk cache and log: HTTP responses, Gemini
+# answers and recordings, Google News redirects, the topic pool and the
+# pre-filter decisions. HTTP_CACHE_DIR is still honoured when CACHE_DIR is unset.
+
+CACHE_DIR = os.getenv('CACHE_DIR') or os.getenv('HTTP_CACHE_DIR') or '.cache'
+
+
+def cache_path(filename):
+    """Path of `filename` inside CACHE_DIR; creates the directory if needed."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.join(CACHE_DIR, filename)
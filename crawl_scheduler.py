@@ -0,0 +1,255 @@
+import contextvars
+import os
+import threading
+import time
+import weakref
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+# --- CRAWL SCHEDULER ---
+# With candidate fetching running in parallel we must not hammer one publisher
+# or news.google.com into 429s. Every crawl request waits here for its host's
+# token bucket and in-flight slot, honours Retry-After, and counts against the
+# request budget of the current run. Time spent queued vs fetching is tracked
+# per host for the process and per run.
+# A streamed response keeps its slot, and its fetch timer running, until the
+# body has been read or the response is closed.
+
+HOST_RATE = float(os.getenv('CRAWL_HOST_RATE', '2'))           # requests per second per host
+HOST_BURST = int(os.getenv('CRAWL_HOST_BURST', '4'))
+MAX_IN_FLIGHT_PER_HOST = int(os.getenv('CRAWL_MAX_IN_FLIGHT_PER_HOST', '2'))
+RUN_BUDGET = int(os.getenv('CRAWL_RUN_BUDGET', '200'))         # requests per run, 0 = unlimited
+MAX_RETRY_AFTER = float(os.getenv('CRAWL_MAX_RETRY_AFTER', '30'))
+
+# Hosts with their own limits (Google News serves every search and redirect).
+HOST_OVERRIDES = {
+    'news.google.com': {'rate': 4.0, 'burst': 8, 'in_flight': 6},
+}
+
+
+class RequestBudgetExceeded(Exception):
+    pass
+
+
+# The run (one search) the current thread or job belongs to; see begin_run
+_current_run = contextvars.ContextVar('crawl_run', default=None)
+
+
+def parse_retry_after(value):
+    """Retry-After is either delay-seconds or an HTTP date; returns seconds or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class _HostState:
+    def __init__(self, rate, burst, in_flight):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.slots = threading.BoundedSemaphore(in_flight)
+        self.requests = 0
+        self.throttled = 0
+        self.queued_s = 0.0
+        self.fetching_s = 0.0
+
+
+def _new_counters():
+    return {'requests': 0, 'throttled': 0, 'queued_s': 0.0, 'fetching_s': 0.0}
+
+
+def _summary(per_host):
+    per_host = {host: dict(c, queued_s=round(c['queued_s'], 3), fetching_s=round(c['fetching_s'], 3))
+                for host, c in per_host.items()}
+    return {
+        'requests': sum(h['requests'] for h in per_host.values()),
+        'queued_s': round(sum(h['queued_s'] for h in per_host.values()), 3),
+        'fetching_s': round(sum(h['fetching_s'] for h in per_host.values()), 3),
+        'per_host': per_host,
+    }
+
+
+class CrawlRun:
+    """
+    Request budget and counters of one run. Concurrent runs (app sessions, the
+    draft prefetcher) each get their own, so none uses up or resets another's.
+    """
+
+    def __init__(self, budget=RUN_BUDGET):
+        self.budget = budget
+        self.used = 0
+        self._per_host = {}
+        self._lock = threading.Lock()
+
+    def charge(self):
+        with self._lock:
+            if self.budget and self.used >= self.budget:
+                raise RequestBudgetExceeded(f"Crawl budget of {self.budget} requests used up for this run")
+            self.used += 1
+
+    def record(self, host, **amounts):
+        with self._lock:
+            counters = self._per_host.setdefault(host, _new_counters())
+            for name, value in amounts.items():
+                counters[name] += value
+
+    def metrics(self):
+        with self._lock:
+            per_host = {host: dict(c) for host, c in self._per_host.items()}
+            return dict(_summary(per_host), budget_used=self.used, budget=self.budget)
+
+
+class CrawlScheduler:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def begin_run(self, budget=None):
+        """
+        Starts a run with its own request budget for the current context (thread
+        or job) and returns it. Requests made outside a run have no budget.
+        """
+        run = CrawlRun(RUN_BUDGET if budget is None else budget)
+        _current_run.set(run)
+        return run
+
+    def _host(self, host):
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                limits = HOST_OVERRIDES.get(host, {})
+                state = _HostState(limits.get('rate', HOST_RATE), limits.get('burst', HOST_BURST),
+                                   limits.get('in_flight', MAX_IN_FLIGHT_PER_HOST))
+                self._hosts[host] = state
+            return state
+
+    def _take_token(self, state):
+        """Blocks until the host's bucket has a token and any Retry-After has passed."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                state.tokens = min(state.burst, state.tokens + (now - state.updated) * state.rate)
+                state.updated = now
+                wait = state.blocked_until - now
+                if wait <= 0:
+                    if state.tokens >= 1:
+                        state.tokens -= 1
+                        return
+                    wait = (1 - state.tokens) / state.rate
+            time.sleep(wait)
+
+    def _record(self, state, run, host, **amounts):
+        with self._lock:
+            for name, value in amounts.items():
+                setattr(state, name, getattr(state, name) + value)
+        if run is not None:
+            run.record(host, **amounts)
+
+    def _releaser(self, state, run, host, started):
+        """Returns a callable that frees the host slot and records the fetch time, once."""
+        released = []
+        lock = threading.Lock()
+
+        def release():
+            with lock:
+                if released:
+                    return
+                released.append(True)
+            self._record(state, run, host, fetching_s=time.monotonic() - started)
+            state.slots.release()
+        return release
+
+    def _hold_until_consumed(self, response, release):
+        # The body of a stream=True response is still on the wire: keep the slot
+        # until it has been iterated to the end or the response is closed
+        # (dropping the response without closing it releases on collection).
+        close = response.close
+        iter_content = response.iter_content
+
+        def close_and_release():
+            try:
+                close()
+            finally:
+                release()
+
+        def iter_and_release(*args, **kwargs):
+            try:
+                yield from iter_content(*args, **kwargs)
+            finally:
+                release()
+
+        response.close = close_and_release
+        response.iter_content = iter_and_release
+        weakref.finalize(response, release)
+
+    def request(self, url, send, stream=False):
+        """
+        Runs `send()` (which performs the HTTP request for `url`) once the host is
+        allowed another request. A 429/503 with a short Retry-After is retried once.
+        With `stream`, the host slot is held until the response body is consumed.
+        """
+        host = (urlparse(url).hostname or '').lower()
+        state = self._host(host)
+        run = _current_run.get()
+
+        for attempt in range(2):
+            if run is not None:
+                run.charge()
+            queued = time.monotonic()
+            state.slots.acquire()
+            try:
+                self._take_token(state)
+            except BaseException:
+                state.slots.release()
+                raise
+            started = time.monotonic()
+            release = self._releaser(state, run, host, started)
+            self._record(state, run, host, requests=1, queued_s=started - queued)
+            try:
+                response = send()
+            except BaseException:
+                release()
+                raise
+
+            if stream and response.status_code not in (429, 503):
+                self._hold_until_consumed(response, release)
+                return response
+            release()
+            if response.status_code not in (429, 503):
+                return response
+            delay = parse_retry_after(response.headers.get('Retry-After'))
+            self._record(state, run, host, throttled=1)
+            with self._lock:
+                if delay is not None:
+                    state.blocked_until = max(state.blocked_until, time.monotonic() + delay)
+            if delay is None or delay > MAX_RETRY_AFTER or attempt:
+                return response
+            print(f"{host} asked us to back off for {delay:.0f}s, retrying...")
+            response.close()
+        return response
+
+    def current_run(self):
+        return _current_run.get()
+
+    def metrics(self, run=None):
+        """Counters of `run`, or of every request this process has made when run is None."""
+        if run is not None:
+            return run.metrics()
+        with self._lock:
+            per_host = {
+                host: {'requests': s.requests, 'throttled': s.throttled,
+                       'queued_s': s.queued_s, 'fetching_s': s.fetching_s}
+                for host, s in self._hosts.items()
+            }
+        return _summary(per_host)
+
+
+scheduler = CrawlScheduler()
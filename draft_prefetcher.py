@@ -0,0 +1,140 @@
+import os
+import threading
+import time
+from collections import deque
+
+import llm
+
+# --- BACKGROUND DRAFT PREFETCH ---
+# A background thread keeps a small buffer of finished Trend Hunter drafts
+# (topic, article and post text), refilling it as drafts are taken and dropping
+# drafts whose article has been published meanwhile or that have gone stale.
+# Once no session has visited the page or taken a draft for DRAFT_IDLE_STOP
+# seconds the thread stops refilling and exits; the next visit starts it again.
+
+DRAFT_BUFFER_SIZE = int(os.getenv('DRAFT_BUFFER_SIZE', '2'))
+DRAFT_MAX_AGE = int(os.getenv('DRAFT_MAX_AGE', str(2 * 3600)))
+DRAFT_IDLE_STOP = int(os.getenv('DRAFT_IDLE_STOP', str(30 * 60)))
+# Seconds between buffer checks while full, and the base delay after a failed attempt
+IDLE_CHECK_S = 30
+RETRY_BASE_S = 30
+
+
+class DraftPrefetcher:
+    """
+    `produce()` returns a draft dict with at least 'url' (canonical) or None;
+    `is_processed(url)` says whether that article was published since.
+    Runs on a daemon thread under `api_key`, so it uses that key's limiter.
+    """
+
+    def __init__(self, produce, is_processed, api_key=None, size=DRAFT_BUFFER_SIZE):
+        self.produce = produce
+        self.is_processed = is_processed
+        self.api_key = api_key
+        self.size = size
+        self.stats = {'produced': 0, 'served': 0, 'dropped': 0, 'failures': 0}
+        self._drafts = deque()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._last_used = time.time()
+
+    def start(self):
+        """Marks the prefetcher as in use and (re)starts its thread if it has stopped."""
+        with self._lock:
+            self._last_used = time.time()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='draft-prefetch', daemon=True)
+                self._thread.start()
+
+    def ready(self):
+        with self._lock:
+            return len(self._drafts)
+
+    def _usable(self, draft):
+        return time.time() - draft['created_at'] < DRAFT_MAX_AGE and not self.is_processed(draft['url'])
+
+    def _prune(self):
+        with self._lock:
+            drafts = list(self._drafts)
+        keep = [d for d in drafts if self._usable(d)]
+        with self._lock:
+            dropped = [d for d in self._drafts if d not in keep]
+            for d in dropped:
+                self._drafts.remove(d)
+            self.stats['dropped'] += len(dropped)
+
+    def take(self):
+        """Returns the oldest usable draft (or None) and wakes the producer to refill."""
+        draft = None
+        while True:
+            with self._lock:
+                if not self._drafts:
+                    break
+                candidate = self._drafts.popleft()
+            if self._usable(candidate):
+                draft = candidate
+                break
+            with self._lock:
+                self.stats['dropped'] += 1
+        with self._lock:
+            self._last_used = time.time()
+            if draft:
+                self.stats['served'] += 1
+        self._wake.set()
+        return draft
+
+    def _stop_if_idle(self):
+        # Decided under the lock start() takes, so a visit either sees the
+        # thread still running or restarts it after it has let go
+        with self._lock:
+            if time.time() - self._last_used < DRAFT_IDLE_STOP:
+                return False
+            self._thread = None
+            return True
+
+    def _run(self):
+        llm.use_api_key(self.api_key)
+        failures = 0
+        while True:
+            if self._stop_if_idle():
+                return
+            self._prune()
+            if self.ready() >= self.size:
+                self._wake.wait(IDLE_CHECK_S)
+                self._wake.clear()
+                continue
+            try:
+                draft = self.produce()
+            except Exception as e:
+                print(f"Draft prefetch failed: {e}")
+                draft = None
+            if draft is None:
+                failures += 1
+                with self._lock:
+                    self.stats['failures'] += 1
+                self._wake.wait(min(600, RETRY_BASE_S * 2 ** min(failures, 5)))
+                self._wake.clear()
+                continue
+            failures = 0
+            draft.setdefault('created_at', time.time())
+            with self._lock:
+                # Two rounds can land on the same article; keep one draft per URL
+                if all(d['url'] != draft['url'] for d in self._drafts):
+                    self._drafts.append(draft)
+                    self.stats['produced'] += 1
+
+
+_prefetchers = {}
+_prefetchers_lock = threading.Lock()
+
+
+def get_prefetcher(api_key, produce, is_processed):
+    """One running prefetcher per API key, shared by every session using that key."""
+    with _prefetchers_lock:
+        prefetcher = _prefetchers.get(api_key)
+        if prefetcher is None:
+            prefetcher = DraftPrefetcher(produce, is_processed, api_key=api_key)
+            _prefetchers[api_key] = prefetcher
+    prefetcher.start()
+    return prefetcher
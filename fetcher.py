@@ -0,0 +1,75 @@
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# --- CONCURRENT CANDIDATE FETCHER ---
+# Candidate articles are downloaded in parallel so a couple of slow publishers
+# can't stall a run; fetch_first still hands back the best-ranked acceptable
+# article, not the fastest one. Per-host politeness is not handled here:
+# candidates are mostly news.google.com links that redirect elsewhere, so
+# crawl_scheduler caps in-flight requests on the host each request actually
+# goes to. Each fetch runs in a copy of the caller's context, so it counts
+# against the caller's crawl run and Gemini key.
+
+MAX_WORKERS = int(os.getenv('FETCH_MAX_WORKERS', '8'))
+
+
+def _safe_fetch(fetch, url):
+    try:
+        return fetch(url)
+    except Exception as e:
+        print(f"Fetch failed for {url}: {e}")
+        return None
+
+
+def fetch_first(candidates, fetch, accept=None, max_workers=None):
+    """
+    Fetches `candidates` (URLs, best first) concurrently and returns the first
+    result in priority order that is not None and passes `accept`.
+
+    `fetch(url)` runs on the worker pool and returns a result or None.
+    `accept(result)` runs on the calling thread, in candidate order, so it can
+    do sequential work such as AI filtering or writing to the URL store.
+    Fetches still queued once a winner is known are cancelled.
+    """
+    candidates = list(candidates)
+    if not candidates:
+        return None
+
+    max_workers = max_workers or MAX_WORKERS
+    stop = threading.Event()
+
+    def run(url):
+        if stop.is_set():
+            return None
+        return _safe_fetch(fetch, url)
+
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(candidates)))
+    try:
+        futures = [executor.submit(contextvars.copy_context().run, run, url) for url in candidates]
+        for future in futures:
+            result = future.result()
+            if result is None:
+                continue
+            if accept is None or accept(result):
+                return result
+        return None
+    finally:
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def fetch_all(candidates, fetch, max_workers=None):
+    """
+    Fetches every candidate concurrently (same worker pool size as fetch_first) and
+    returns the non-None results in candidate order.
+    """
+    candidates = list(candidates)
+    if not candidates:
+        return []
+
+    with ThreadPoolExecutor(max_workers=min(max_workers or MAX_WORKERS, len(candidates))) as executor:
+        futures = [executor.submit(contextvars.copy_context().run, _safe_fetch, fetch, url) for url in candidates]
+        results = [future.result() for future in futures]
+    return [r for r in results if r is not None]
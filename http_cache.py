@@ -0,0 +1,204 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from cache_config import cache_path
+
+# --- ON-DISK HTTP CACHE ---
+# Manual Topic Scout is run on the same subjects many times a day. Search pages
+# and article HTML are kept on disk with a TTL per URL class, revalidated with
+# ETag / Last-Modified once stale, and evicted least-recently-used once the
+# cache grows past its size limit. An article download that stopped once the
+# extractor had enough text is stored as a prefix, tagged with the text budget
+# it satisfied; only callers asking for no more than that are served from it.
+
+CACHE_MAX_BYTES = int(os.getenv('HTTP_CACHE_MAX_BYTES', str(200 * 1024 * 1024)))
+
+# Seconds a stored response is served without asking the server again.
+TTL_BY_CLASS = {
+    'search': 15 * 60,
+    'article': 7 * 24 * 3600,
+}
+
+
+def classify_url(url):
+    """Google News search/feed pages change quickly; everything else is an article."""
+    if 'news.google.com/search' in url or 'news.google.com/rss' in url:
+        return 'search'
+    return 'article'
+
+
+class HttpCache:
+    def __init__(self, db_path, max_bytes=CACHE_MAX_BYTES):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'stored': 0, 'evicted': 0}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                final_url TEXT,
+                status INTEGER,
+                headers TEXT,
+                body BLOB,
+                etag TEXT,
+                last_modified TEXT,
+                expires_at REAL,
+                last_access REAL,
+                size INTEGER,
+                partial_chars INTEGER
+            )
+        """)
+        # Caches created before prefixes were tagged: add the column (NULL = full body)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(responses)")}
+        if 'partial_chars' not in columns:
+            self._conn.execute("ALTER TABLE responses ADD COLUMN partial_chars INTEGER")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)")
+        self._conn.commit()
+
+    def lookup(self, url):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT final_url, status, headers, body, etag, last_modified, expires_at, partial_chars "
+                "FROM responses WHERE url = ?",
+                (url,)
+            ).fetchone()
+            if row:
+                self._conn.execute("UPDATE responses SET last_access = ? WHERE url = ?", (time.time(), url))
+                self._conn.commit()
+        if not row:
+            return None
+        final_url, status, headers, body, etag, last_modified, expires_at, partial_chars = row
+        return {
+            'final_url': final_url, 'status': status, 'headers': json.loads(headers), 'body': body,
+            'etag': etag, 'last_modified': last_modified, 'expires_at': expires_at, 'partial_chars': partial_chars,
+        }
+
+    def store(self, url, response, ttl, body=None, partial_chars=None):
+        """
+        Stores `response`; `body` overrides response.content for streamed downloads.
+        `partial_chars` marks `body` as a prefix that holds that much article text.
+        """
+        headers = dict(response.headers)
+        if body is None:
+            body = response.content
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (url, final_url, status, headers, body, etag, last_modified, "
+                "expires_at, last_access, size, partial_chars) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, response.url, response.status_code, json.dumps(headers), body,
+                 headers.get('ETag'), headers.get('Last-Modified'), now + ttl, now, len(body), partial_chars)
+            )
+            self.stats['stored'] += 1
+            self._evict()
+            self._conn.commit()
+
+    def refresh(self, url, ttl):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET expires_at = ?, last_access = ? WHERE url = ?",
+                (time.time() + ttl, time.time(), url)
+            )
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for url, size in self._conn.execute("SELECT url, size FROM responses ORDER BY last_access").fetchall():
+            self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            self.stats['evicted'] += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+
+def to_response(url, entry):
+    """Rebuilds a requests.Response from a cache entry so callers can't tell the difference."""
+    response = requests.Response()
+    response.status_code = entry['status']
+    response.url = entry['final_url'] or url
+    response.headers = CaseInsensitiveDict(entry['headers'])
+    response._content = entry['body']
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    return response
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = HttpCache(cache_path('http_cache.db'))
+    return _cache
+
+
+def lookup_article(url, max_chars=None):
+    """
+    Returns the cache entry for `url`, fresh or stale, if it can answer a request
+    for `max_chars` of article text: a stored prefix only counts when it was cut
+    at `max_chars` or more. Otherwise None.
+    """
+    entry = get_cache().lookup(url)
+    if entry and entry['partial_chars'] is not None and (max_chars is None or max_chars > entry['partial_chars']):
+        return None
+    return entry
+
+
+def is_fresh(entry):
+    return entry['expires_at'] > time.time()
+
+
+def validators(entry):
+    """If-None-Match / If-Modified-Since headers that revalidate a stale entry."""
+    headers = {}
+    if entry['etag']:
+        headers['If-None-Match'] = entry['etag']
+    if entry['last_modified']:
+        headers['If-Modified-Since'] = entry['last_modified']
+    return headers
+
+
+def cached_get(session, url, url_class=None, **kwargs):
+    """
+    GET through the disk cache. Fresh entries are served directly; stale ones are
+    revalidated with If-None-Match / If-Modified-Since; only 200s are stored.
+    """
+    cache = get_cache()
+    ttl = TTL_BY_CLASS[url_class or classify_url(url)]
+    entry = cache.lookup(url)
+    if entry and entry['partial_chars'] is not None:
+        # A truncated article download is no answer to a full-page request
+        entry = None
+
+    if entry and is_fresh(entry):
+        cache.stats['hits'] += 1
+        return to_response(url, entry)
+
+    headers = dict(kwargs.pop('headers', None) or {})
+    if entry:
+        headers.update(validators(entry))
+
+    response = session.get(url, headers=headers, **kwargs)
+
+    if entry and response.status_code == 304:
+        cache.stats['revalidated'] += 1
+        cache.refresh(url, ttl)
+        return to_response(url, entry)
+
+    cache.stats['misses'] += 1
+    if response.status_code == 200:
+        cache.store(url, response, ttl)
+    return response
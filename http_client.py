@@ -0,0 +1,195 @@
+import codecs
+import os
+import threading
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import http_cache
+from article_extract import ArticleExtractor
+from crawl_scheduler import scheduler
+
+# --- SHARED HTTP CLIENT ---
+# One pooled requests.Session per process so repeated calls to news.google.com,
+# publishers and api.linkedin.com reuse keep-alive connections instead of doing
+# a fresh TCP/TLS handshake every time.
+
+DEFAULT_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', '10'))
+DEFAULT_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '4'))
+# Article downloads stop after this many bytes, whatever the page size.
+MAX_DOWNLOAD_BYTES = int(os.getenv('HTTP_MAX_DOWNLOAD_BYTES', str(2 * 1024 * 1024)))
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+# Publishing calls are not crawling: they skip the politeness scheduler.
+UNSCHEDULED_HOSTS = {'api.linkedin.com', 'www.linkedin.com'}
+
+# Hosts we hit many times per run get a bigger connection pool.
+HOST_POOL_SIZES = {
+    'https://news.google.com': 16,
+    'https://api.linkedin.com': 4,
+}
+
+
+class _PooledSession(requests.Session):
+    """
+    requests.Session that applies DEFAULT_TIMEOUT when a call does not pass one
+    and sends crawl requests through the per-host scheduler.
+    """
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', DEFAULT_TIMEOUT)
+        send = lambda: super(_PooledSession, self).request(method, url, **kwargs)
+        if (urlparse(url).hostname or '').lower() in UNSCHEDULED_HOSTS:
+            return send()
+        return scheduler.request(url, send, stream=kwargs.get('stream', False))
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _build_session():
+    session = _PooledSession()
+    session.headers.update(DEFAULT_HEADERS)
+    default_adapter = HTTPAdapter(pool_connections=32, pool_maxsize=DEFAULT_POOL_SIZE)
+    session.mount('https://', default_adapter)
+    session.mount('http://', default_adapter)
+    for prefix, size in HOST_POOL_SIZES.items():
+        session.mount(prefix, HTTPAdapter(pool_connections=1, pool_maxsize=size))
+    return session
+
+
+def get_session():
+    """Returns the process-wide pooled session."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def get(url, **kwargs):
+    return get_session().get(url, **kwargs)
+
+
+def head(url, **kwargs):
+    return get_session().head(url, **kwargs)
+
+
+def post(url, **kwargs):
+    return get_session().post(url, **kwargs)
+
+
+def put(url, **kwargs):
+    return get_session().put(url, **kwargs)
+
+
+def get_cached(url, url_class=None, **kwargs):
+    """GET served from the on-disk HTTP cache when possible (see http_cache)."""
+    return http_cache.cached_get(get_session(), url, url_class=url_class, **kwargs)
+
+
+def cache_stats():
+    return dict(http_cache.get_cache().stats)
+
+
+def begin_crawl(budget=None):
+    """
+    Starts a crawl run for the current thread or job, with its own request
+    budget and counters; call at the start of each search. Returns the run.
+    """
+    return scheduler.begin_run(budget)
+
+
+def current_crawl():
+    return scheduler.current_run()
+
+
+def crawl_metrics(run=None):
+    """Network counters of `run` (see begin_crawl), or of the whole process when run is None."""
+    return scheduler.metrics(run)
+
+
+def _charset(response):
+    # requests falls back to ISO-8859-1 for text/html without a charset; most
+    # article pages are UTF-8 in that case.
+    if 'charset=' in response.headers.get('Content-Type', '').lower():
+        try:
+            return codecs.lookup(response.encoding).name
+        except (LookupError, TypeError):
+            pass
+    return 'utf-8'
+
+
+def fetch_article(url, max_chars=None, max_bytes=None, timeout=None):
+    """
+    Downloads an article page and extracts its main text while it streams in.
+
+    Non-HTML responses (PDFs, video, images) and pages whose Content-Length is
+    over `max_bytes` are rejected before the body is read. Otherwise at most
+    `max_bytes` are read, and reading stops as soon as the extractor has
+    `max_chars` of article text. Returns {'title', 'text', 'url'} or None.
+    """
+    max_bytes = max_bytes or MAX_DOWNLOAD_BYTES
+    cache = http_cache.get_cache()
+    ttl = http_cache.TTL_BY_CLASS['article']
+
+    entry = http_cache.lookup_article(url, max_chars=max_chars)
+    if entry and http_cache.is_fresh(entry):
+        cache.stats['hits'] += 1
+        return _extract_cached(url, entry, max_chars)
+
+    # A stale entry is revalidated: a 304 costs no body download
+    headers = http_cache.validators(entry) if entry else {}
+    response = get_session().get(url, stream=True, headers=headers, timeout=timeout or DEFAULT_TIMEOUT)
+    with response:
+        if entry and response.status_code == 304:
+            cache.stats['revalidated'] += 1
+            cache.refresh(url, ttl)
+            return _extract_cached(url, entry, max_chars)
+        if response.status_code != 200:
+            return None
+        content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type and content_type not in HTML_CONTENT_TYPES:
+            return None
+        length = response.headers.get('Content-Length')
+        if length and length.isdigit() and int(length) > max_bytes:
+            return None
+
+        extractor = ArticleExtractor(max_chars=max_chars)
+        decoder = codecs.getincrementaldecoder(_charset(response))(errors='replace')
+        chunks = []
+        received = 0
+        complete = True
+        partial_chars = None
+        for chunk in response.iter_content(chunk_size=16384):
+            chunks.append(chunk)
+            received += len(chunk)
+            if extractor.feed(decoder.decode(chunk)):
+                partial_chars = max_chars
+                break
+            if received >= max_bytes:
+                complete = False
+                break
+
+    cache.stats['misses'] += 1
+    # A prefix that satisfied the extractor is stored tagged with the budget it
+    # met, so callers wanting more text fetch again; pages cut off by the byte
+    # cap are not cached.
+    if complete:
+        cache.store(url, response, ttl, body=b''.join(chunks), partial_chars=partial_chars)
+    return dict(extractor.result(), url=response.url)
+
+
+def _extract_cached(url, entry, max_chars):
+    cached = http_cache.to_response(url, entry)
+    extractor = ArticleExtractor(max_chars=max_chars)
+    extractor.feed(cached.content.decode(_charset(cached), errors='replace'))
+    return dict(extractor.result(), url=cached.url)
@@ -0,0 +1,167 @@
+import contextvars
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# --- BACKGROUND JOBS ---
+# Article searches, image descriptions, quiz renders and LinkedIn uploads run
+# on a shared worker pool as jobs keyed by (session, name), off the Streamlit
+# script thread, so the page stays responsive and reruns don't lose the work.
+# A job outlives reruns; its result stays here until the session claims it once.
+# Jobs run in a copy of the submitting context, so the session's Gemini key
+# (a contextvar) follows them into the worker.
+
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '4'))
+# Finished jobs nobody claimed (closed tab, abandoned session) are forgotten after this
+JOB_RESULT_TTL = int(os.getenv('JOB_RESULT_TTL', str(3600)))
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED = {DONE, FAILED, CANCELLED}
+
+_current_job = contextvars.ContextVar('current_job', default=None)
+
+
+class JobCancelled(Exception):
+    """Raised by report() inside a job once the job has been cancelled."""
+
+
+class Job:
+    def __init__(self, session_id, name, label=''):
+        self.id = uuid.uuid4().hex
+        self.session_id = session_id
+        self.name = name
+        self.label = label or name
+        self.status = QUEUED
+        self.progress = 0.0
+        self.message = self.label
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self._cancel = threading.Event()
+        self._future = None
+        self._lock = threading.Lock()
+
+    @property
+    def done(self):
+        return self.status in FINISHED
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def _finish(self, status, result=None, error=None):
+        with self._lock:
+            # A job cancelled while running keeps that status; its late result is dropped
+            if self.done:
+                return
+            self.status = status
+            self.result = result
+            self.error = error
+            self.progress = 1.0 if status == DONE else self.progress
+            self.finished_at = time.time()
+
+    def cancel(self):
+        """
+        Queued jobs never start. Running ones are marked cancelled at once; the
+        work itself stops at its next report() or finishes and is discarded.
+        """
+        self._cancel.set()
+        if self._future is not None:
+            self._future.cancel()
+        self._finish(CANCELLED)
+
+
+def report(progress=None, message=None):
+    """Progress update from inside a job (no-op elsewhere); raises JobCancelled if it was cancelled."""
+    job = _current_job.get()
+    if job is None:
+        return
+    if job.cancelled:
+        raise JobCancelled(job.name)
+    if progress is not None:
+        job.progress = max(0.0, min(1.0, progress))
+    if message is not None:
+        job.message = message
+
+
+class JobRunner:
+    def __init__(self, workers=JOB_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def _expire(self):
+        cutoff = time.time() - JOB_RESULT_TTL
+        for key in [k for k, j in self._jobs.items() if j.done and j.finished_at < cutoff]:
+            del self._jobs[key]
+
+    def submit(self, session_id, name, fn, *args, label='', **kwargs):
+        """Starts `fn(*args, **kwargs)` as the session's `name` job; returns the running one if there is one."""
+        with self._lock:
+            self._expire()
+            job = self._jobs.get((session_id, name))
+            if job is not None and not job.done:
+                return job
+            job = Job(session_id, name, label)
+            self._jobs[(session_id, name)] = job
+        job._future = self._pool.submit(contextvars.copy_context().run, self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        with job._lock:
+            if job.done:
+                return
+            job.status = RUNNING
+        _current_job.set(job)
+        try:
+            result = fn(*args, **kwargs)
+        except JobCancelled:
+            job._finish(CANCELLED)
+        except Exception as e:
+            print(f"Job '{job.name}' failed: {e}")
+            job._finish(FAILED, error=e)
+        else:
+            job._finish(DONE, result)
+
+    def get(self, session_id, name):
+        with self._lock:
+            return self._jobs.get((session_id, name))
+
+    def claim(self, session_id, name):
+        """Returns the session's finished `name` job once and forgets it; None while it runs."""
+        with self._lock:
+            job = self._jobs.get((session_id, name))
+            if job is None or not job.done:
+                return None
+            del self._jobs[(session_id, name)]
+            return job
+
+    def cancel(self, session_id, name):
+        job = self.get(session_id, name)
+        if job is not None:
+            job.cancel()
+        return job
+
+    def active(self, session_id):
+        with self._lock:
+            return [j for (sid, _), j in self._jobs.items() if sid == session_id and not j.done]
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def get_runner():
+    global _runner
+    if _runner is None:
+        with _runner_lock:
+            if _runner is None:
+                _runner = JobRunner()
+    return _runner
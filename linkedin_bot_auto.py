@@ -1,12 +1,15 @@
 import requests
-from bs4 import BeautifulSoup
 import re
-from datetime import datetime
-from requests_oauthlib import OAuth2Session
-import google.generativeai as genai
-import pandas as pd
 import os
 from dotenv import load_dotenv
+import http_client
+import llm
+import topic_service
+from text_budget import fit_to_budget
+import news_discovery
+import redirect_cache
+from url_classifier import canonical_url, default_classifier
+from url_store import open_store
 
 # Load environment variables
 load_dotenv()
@@ -19,131 +22,70 @@ LINKEDIN_REDIRECT_URI = os.getenv('LINKEDIN_REDIRECT_URI')
 LINKEDIN_ACCESS_TOKEN = os.getenv('LINKEDIN_ACCESS_TOKEN')
 LINKEDIN_AUTHOR_URN = os.getenv('LINKEDIN_AUTHOR_URN')
 
-genai.configure(api_key=GEMINI_API_KEY)
+# Token budget for the article text inside the post prompt
+POST_CONTENT_TOKENS = 150
 
 # Function to get trending tech topic
 def get_trending_tech_topic():
-    print("Consulting AI for trending tech topics...")
-    model = genai.GenerativeModel("gemini-1.5-flash") # Using 1.5 flash for speed/cost, or could use 2.5
-    
-    prompt = f"""
-    Give me one trending technical specific search term for Google News related to AI, Tech, or Finance for today ({datetime.now().strftime('%Y-%m-%d')}). 
-    Output ONLY the search term (e.g., 'Gemini 1.5 Pro launch' or 'Nvidia stock surge'). Do not add quotes.
-    """
-    try:
-        response = model.generate_content(prompt)
-        topic = response.text.strip().replace('"', '').replace("'", "")
-        print(f"AI Suggested Topic: {topic}")
-        return topic
-    except Exception as e:
-        print(f"Error generating topic: {e}")
-        return "Artificial Intelligence News"
+    # Next topic from the shared on-disk pool; only a stale or used-up pool costs a Gemini call
+    topic = topic_service.next_topic()
+    print(f"AI Suggested Topic: {topic}")
+    return topic
 
 # Function to read processed URLs from a sheet
 
 def read_processed_urls(sheet_path):
-    try:
-        df = pd.read_csv(sheet_path)
-        return set(df['url'].tolist())
-    except FileNotFoundError:
-        return set()
+    return open_store(sheet_path)
 
 # Function to add a URL to the sheet
 
 def add_url_to_sheet(sheet_path, url):
     # Ensure URL does not end with a slash
     clean_url = url.rstrip('/')
-    df = pd.DataFrame({'url': [clean_url]})
-    
-    # Check if file exists to handle header correctly
-    try:
-        pd.read_csv(sheet_path)
-        # File exists, append without header
-        df.to_csv(sheet_path, mode='a', header=False, index=False)
-    except FileNotFoundError:
-        # File doesn't exist, create with header
-        df.to_csv(sheet_path, mode='w', header=True, index=False)
+    open_store(sheet_path).add(clean_url)
 
-# Function to fetch AI/ML news articles from Google News and summarize the first article
+# Function to pull candidate article URLs out of the Google News search page
 
-def fetch_ai_trends_from_google_and_summarize(search_subject='AI+OR+machine+learning', sheet_path='processed_urls.csv'):
+def scrape_search_page(search_subject, processed_urls):
+    """Fallback discovery: article URLs pulled out of the Google News HTML search page."""
+    from bs4 import BeautifulSoup
     # Replace spaces with + for URL compatibility within the function now
     search_query = search_subject.replace(' ', '+')
     url = f'https://news.google.com/search?q={search_query}&hl=en-US&gl=US&ceid=US:en'
     
-    print(f"Searching for: {search_subject}...")
-    response = requests.get(url)
+    response = http_client.get(url)
     soup = BeautifulSoup(response.content, 'html.parser')
     
     # Extract all HTTPS URLs using regex
     html_content = str(soup)
     https_urls = re.findall(r'https?://[^\s<>"]+', html_content, re.IGNORECASE)
     
-    # Define exclusion patterns
-    exclude_patterns = [
-        'gstatic.com',
-        'googleusercontent.com',
-        'google.com/search',
-        'google.com/url',
-        'accounts.google.com',
-        'play.google.com',
-        'blogger.googleusercontent.com',
-        'cdn-apple.com',
-        'cloudfront.net',
-        'springernature.com',
-        'b-cdn.net',
-        'transforms.svdcdn.com',
-        'contentstack.com',
-        '.jpg', '.jpeg', '.png', '.gif', '.webp', '.ico',
-        'favicon',
-        'image', '/img/', '/images/',
-        'media.',
-        'thumbnail',
-        'storage.googleapis.com',
-        'lh3.googleusercontent.com',
-        'accounts.',
-        'login.',
-        'auth.',
-        'amp/',
-        '.amp',  
-        'rss/',
-        'feed/',
-        'signup',
-        'subscribe',
-        'advertisement',
-        'analytics'
-    ]
-    
+    # One pass over the page: keyword matches first, generic article links as the fallback
+    # (panic mode logic from Pro version). Patterns are compiled once in url_classifier.
+    return default_classifier.select(https_urls, processed_urls)
+
+# Function to fetch AI/ML news articles from Google News and summarize the first article
+
+def fetch_ai_trends_from_google_and_summarize(search_subject='AI+OR+machine+learning', sheet_path='processed_urls.csv'):
+    print(f"Searching for: {search_subject}...")
     processed_urls = read_processed_urls(sheet_path)
-    relevant_urls = []
-    seen_urls = set()
-    
-    for url in https_urls:
-        if any(pattern in url.lower() for pattern in exclude_patterns):
-            continue
-        if any(keyword in url.lower() for keyword in ['ai', 'artificial-intelligence', 'machine-learning', 'tech', 'finance', 'crypto', 'robotics']): # Expanded keywords
-            clean_url = url.split('?')[0].split('#')[0].rstrip('/')
-            if clean_url not in seen_urls:
-                seen_urls.add(clean_url)
-                if clean_url not in processed_urls:
-                    relevant_urls.append(url)
-    
-    # Fallback: if no keywords match but it's a valid article link (panic mode logic from Pro version, simplified)
+
+    # Structured candidates from the Google News RSS feed; HTML scraping is the fallback
+    relevant_urls = [c['url'] for c in news_discovery.search_news(search_subject)]
     if not relevant_urls:
-         for url in https_urls:
-            if any(pattern in url.lower() for pattern in exclude_patterns): continue
-            if '/read/' in url or 'articles' in url:
-                clean_url = url.split('?')[0].split('#')[0].rstrip('/')
-                if clean_url not in seen_urls and clean_url not in processed_urls:
-                    relevant_urls.append(url)
+        relevant_urls = scrape_search_page(search_subject, processed_urls)
 
     selected_url = None
     for url in relevant_urls:
-        clean_url = url.split('?')[0].split('#')[0].rstrip('/')
+        # RSS links point at news.google.com; resolve to the publisher URL first
+        url = redirect_cache.resolve(url)
+        clean_url = canonical_url(url)
         if clean_url not in processed_urls:
             print(f"Checking URL: {clean_url}")
             try:
-                response = requests.get(clean_url, timeout=10) # Added timeout
+                # Status check only: stream=True + close() skips downloading the body
+                response = http_client.get(clean_url, stream=True, timeout=10) # Added timeout
+                response.close()
                 if response.status_code == 200:
                     selected_url = clean_url
                     print(f"Good URL found: {clean_url}")
@@ -187,7 +129,7 @@ def post_to_linkedin(content, access_token):
             "com.linkedin.ugc.MemberNetworkVisibility": "PUBLIC"
         }
     }
-    response = requests.post(linkedin_api_url, headers=headers, json=post_data)
+    response = http_client.post(linkedin_api_url, headers=headers, json=post_data)
     if response.status_code == 201:
         print("Post successfully created on LinkedIn.")
     else:
@@ -197,48 +139,21 @@ def post_to_linkedin(content, access_token):
 
 def generate_linkedin_post(url):
     try:
-        response = requests.get(url)
-        soup = BeautifulSoup(response.text, 'html.parser')
+        article = http_client.fetch_article(url, max_chars=2000)
+        if article is None:
+            print(f"Could not read article: {url}")
+            return None
         
-        title = soup.title.string if soup.title else ""
-        article_text = ""
-        for paragraph in soup.find_all('p'):
-            article_text += paragraph.get_text() + "\n"
+        title = article['title']
+        article_text = article['text']
         print(title)
         # print(article_text) # Hidden to reduce noise
         
-        # Find the position of the first period after 500 characters
-        end_position = article_text[:500].rfind('.') + 1
-        # If no period is found, default to 500 characters
-        if end_position == 0:
-            end_position = 500
-        
-        prompt = f"""Based on this article:
-Title: {title}
-Content: {article_text[:end_position]}
-
-Please create an engaging LinkedIn post The post should have a hook,rehook,body,call to action:
-0. Captures attention with a strong opening line
-1. Highlights the key points of the article
-2. Adds professional insights
-3. Uses appropriate hashtags
-4. Includes a call to action
-5. Keeps the length appropriate for LinkedIn (under 1300 characters)
-6. Maintains a professional tone
-7. don't include source URL at all or something like refer to the blog post (url)
-8. never do like this and talk on my behalf "Tired of AI limited to text?  My latest article explores building Multimodal RAG systems – enabling your AI to process ANY file type (images, PDFs, audio, etc.)!  This builds upon previous work on multimodal LLMs and embedding models." 'My latest article' talk in general about the article 
-9. use something like  'follow me for more on AI news' 
-10. be creative 
-11. add questions to keep people engaged
-Format the post with line breaks and emojis where appropriate.
-12. dont add something like Here's an engaging LinkedIn post based on the article:
+        # Whole sentences only, redundant ones dropped, within the prompt's token budget
+        summary = fit_to_budget(article_text, POST_CONTENT_TOKENS, summarize=True)
 
-give just the post"""     
-
-        model = genai.GenerativeModel("gemini-2.5-flash")
-        response = model.generate_content(prompt)
-        
-        linkedin_post = response.text
+        # Rules are sent as the template's system instruction
+        linkedin_post = llm.generate_from_template('linkedin_post', title=title, content=summary)
         
         print("\nGenerated LinkedIn Post:")
         print("-" * 50)
@@ -253,6 +168,8 @@ give just the post"""
 
 def main():
     print("Welcome to LinkedIn Content Automation (Auto Mode)!")
+    llm.warm(GEMINI_API_KEY)
+    http_client.begin_crawl()
     
     # OLD: Manual Input
     # search_subject = input("Enter your search subject (e.g., 'AI+OR+machine+learning'): ")
@@ -1,17 +1,23 @@
-import requests
-from bs4 import BeautifulSoup
 import re
-import google.generativeai as genai
-import pandas as pd
 import os
 from dotenv import load_dotenv
+import http_client
+import llm
+import topic_service
+from topic_service import TopicManager
+from text_budget import fit_to_budget
+import news_discovery
+import redirect_cache
+from url_classifier import UrlClassifier
+from url_store import open_store
+from fetcher import fetch_all, fetch_first
+from article_prefilter import log_decision, prefilter
 
 # Load environment variables
 load_dotenv()
 import time
 import random
 import json
-from datetime import datetime, timedelta
 import os
 
 # --- CONFIGURATION ---
@@ -19,267 +25,209 @@ GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 LINKEDIN_ACCESS_TOKEN = os.getenv('LINKEDIN_ACCESS_TOKEN')
 LINKEDIN_AUTHOR_URN = os.getenv('LINKEDIN_AUTHOR_URN')
 
-genai.configure(api_key=GEMINI_API_KEY)
-
 # --- UTILS ---
 
 def read_processed_urls(sheet_path='processed_urls.csv'):
-    try:
-        df = pd.read_csv(sheet_path)
-        return set(df['url'].tolist())
-    except FileNotFoundError:
-        return set()
+    return open_store(sheet_path)
 
 def add_url_to_sheet(sheet_path, url):
     clean_url = url.rstrip('/')
-    df = pd.DataFrame({'url': [clean_url]})
     try:
-        try:
-            pd.read_csv(sheet_path)
-            # File exists, append without header
-            df.to_csv(sheet_path, mode='a', header=False, index=False)
-        except FileNotFoundError:
-             # File doesn't exist, create with header
-            df.to_csv(sheet_path, mode='w', header=True, index=False)
+        open_store(sheet_path).add(clean_url)
     except Exception as e:
         print(f"Error saving URL: {e}")
 
 # --- TOPIC MANAGEMENT ---
 
-class TopicManager:
-    def __init__(self, history_file='topic_history.json'):
-        self.history_file = history_file
-        self.history = self._load_history()
-
-    def _load_history(self):
-        try:
-            with open(self.history_file, 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return []
-
-    def get_banned_topics(self, days=5):
-        """Returns topics used in the last N days."""
-        cutoff = datetime.now() - timedelta(days=days)
-        banned = []
-        for entry in self.history:
-            try:
-                entry_date = datetime.strptime(entry['date'], "%Y-%m-%d")
-                if entry_date > cutoff:
-                    banned.append(entry['topic'])
-            except ValueError:
-                continue # Skip malformed dates
-        return banned
-
-    def log_topic(self, topic):
-        """Logs a new topic usage."""
-        print(f"Logging topic usage: {topic}")
-        self.history.append({
-            'date': datetime.now().strftime("%Y-%m-%d"),
-            'topic': topic
-        })
-        # Keep history clean, limit to last 50 entries
-        if len(self.history) > 50:
-            self.history = self.history[-50:]
-        
-        try:
-            with open(self.history_file, 'w') as f:
-                json.dump(self.history, f, indent=2)
-        except Exception as e:
-            print(f"Error saving topic history: {e}")
-
 def get_trending_topic(avoid_topics):
-    """Asks Gemini for a trending topic, avoiding recent ones."""
-    model = genai.GenerativeModel("gemini-2.5-flash")
-    
-    avoid_str = ", ".join(avoid_topics) if avoid_topics else "None"
-    
-    prompt = f"""
-    Suggest ONE currently trending search term/topic in the Technology sector for today ({datetime.now().strftime('%Y-%m-%d')}).
-    
-    Scope:
-    - AI & Tech (Generative AI, Robotics, Hardware, Software)
-    - Tech x Finance (FinTech, Crypto regulations, AI in banking)
-    - Tech x Marketing (AdTech, Social Media algorithms, AI content)
-    
-    Context:
-    - This is for a LinkedIn bot that finds news articles.
-    - The topic must be popular enough to have news written about it TODAY.
-    
-    Constraints:
-    - Respond with JUST the search term. No quotes, no explanations.
-    - Do NOT suggest any of these previously covered topics: {avoid_str}
-    - Keep it under 5 words.
-    """
-    
-    try:
-        print("Consulting AI for trending topics...")
-        response = model.generate_content(prompt)
-        topic = response.text.strip().replace('"', '').replace("'", "")
-        print(f"AI Suggested Topic: {topic}")
-        return topic
-    except Exception as e:
-        print(f"Topic generation error: {e}")
-        return "Artificial Intelligence" # Safe fallback
+    """Next trending topic from the shared pool (one Gemini call per pool), avoiding recent ones."""
+    topic = topic_service.next_topic(avoid_topics)
+    print(f"AI Suggested Topic: {topic}")
+    return topic
 
 # --- AI ENGINES ---
 
-def filter_article_with_ai(title, content_snippet):
+# Tokens of article text shown per candidate in the batch scoring prompt
+SCORING_SNIPPET_TOKENS = 150
+# Token budget for the article text inside the post prompt
+POST_CONTENT_TOKENS = 500
+# Minimum editor score (0-10) for an article to be worth a post
+MIN_ARTICLE_SCORE = 6
+
+def score_articles_with_ai(articles):
     """
-    Asks Gemini if the article is worth posting.
-    Returns: Boolean
+    Scores all candidate articles in ONE Gemini call.
+    Returns a list aligned with `articles` of {'score': int, 'reason': str},
+    or None if the call or its JSON could not be used.
     """
-    model = genai.GenerativeModel("gemini-2.5-flash")
+    if not articles:
+        return []
+
+    candidates = "\n\n".join(
+        f"[{i}] Title: {a['title']}\nSnippet: {fit_to_budget(a['text'], SCORING_SNIPPET_TOKENS)}"
+        for i, a in enumerate(articles)
+    )
     prompt = f"""
     Act as a strictly critical Editor-in-Chief for a high-end Tech Consultancy.
     
-    Article Title: {title}
-    Snippet: {content_snippet[:1000]}
-    
-    Task: Decide if this article is worthy of a LinkedIn post for an AI/Tech professional audience.
-    Criteria for YES:
+    Rate each candidate article below on whether it is worthy of a LinkedIn post for an AI/Tech professional audience.
+    Criteria for a high score:
     1. Discusses a MAJOR breakthrough, meaningful trend, or useful tool.
     2. Is not just generic marketing fluff or a "how to install python" tutorial.
     3. Has substance to comment on.
     
-    Reply ONLY with 'YES' or 'NO'.
+    CANDIDATES:
+    {candidates}
+    
+    Reply ONLY with a JSON array containing one object per candidate:
+    [{{"id": <candidate number>, "score": <0-10>, "reason": "<max 12 words>"}}]
     """
     try:
-        response = model.generate_content(prompt)
-        decision = response.text.strip().upper()
-        # print(f"AI Editor decision: {decision}")
-        return "YES" in decision
+        raw = llm.generate_text(prompt, generation_config={"response_mime_type": "application/json"})
+        scores = [None] * len(articles)
+        for item in json.loads(raw):
+            i = int(item['id'])
+            if 0 <= i < len(articles):
+                scores[i] = {'score': int(item['score']), 'reason': str(item.get('reason', ''))}
+        # Candidates the model skipped count as rejected
+        return [s or {'score': 0, 'reason': 'Not scored'} for s in scores]
     except Exception as e:
-        print(f"Filter error: {e}")
+        print(f"Scoring error: {e}")
+        return None
+
+def filter_article_with_ai(title, content_snippet):
+    """
+    Asks Gemini if a single article is worth posting.
+    Returns: Boolean
+    """
+    scores = score_articles_with_ai([{'title': title, 'text': content_snippet}])
+    if scores is None:
         return True # Default to allow if error
+    return scores[0]['score'] >= MIN_ARTICLE_SCORE
 
 def generate_viral_post(title, article_text, url):
     """
     Generates a high-quality LinkedIn post using advanced prompting.
     """
-    model = genai.GenerativeModel("gemini-2.5-flash")
-    
-    prompt = f"""
-    ROLE: Expert AI Thought Leader & Tech Influencer.
-    TONE: Professional yet conversational, insightful, forward-thinking.
-    
-    SOURCE MATERIAL:
-    Title: {title}
-    Content: {article_text[:2000]}
-    
-    TASK: Write a LinkedIn post that will get high engagement.
-    
-    STRUCTURE:
-    1. **The Hook**: A standalone, punchy one-liner that disrupts common thinking or states a surprising fact. (Max 15 words)
-    2. **The Spacer**: A blank line.
-    3. **The Insight**: 2-3 short paragraphs explaining WHY this matters. Do not just summarize. Add value. Synthesize. Connect dots.
-    4. **The Pivot**: "This changes how we think about [Concept]..."
-    5. **The Question**: An engaging question to drive comments.
-    6. **Hashtags**: 3-5 relevant, high-traffic hashtags.
-    
-    CONSTRAINTS:
-    - NO "In this article" or "I was reading today". Start directly with the topic.
-    - NO "Thrilled to announce" or generic corporate speak.
-    - NO long walls of text. Use short sentences.
-    - DO NOT include the URL in the text body (it will be attached as a link card).
-    - Emoji usage: Moderate (2-3 max), used for emphasis, not decoration.
-    
-    OUTPUT FORMAT:
-    Just the post text. No "Here is the post" preamble.
-    """
-    
     try:
-        response = model.generate_content(prompt)
-        return response.text.strip()
+        # Static rules go as the template's system instruction; only the source material changes
+        return llm.generate_from_template(
+            'viral_post',
+            title=title,
+            content=fit_to_budget(article_text, POST_CONTENT_TOKENS, summarize=True)
+        ).strip()
     except Exception as e:
         print(f"Generation error: {e}")
         return None
 
 # --- CONTENT FETCHING ---
 
+# Paywalled / video publishers we never post from
+PUBLISHER_FILTER = UrlClassifier(exclude_patterns=(), keywords=(), excluded_domains=['nyt.com', 'wsj.com', 'bloomberg.com', 'youtube.com'])
+
+def scrape_article_links(search_term):
+    """Fallback discovery: article links from the Google News HTML search page."""
+    from bs4 import BeautifulSoup
+    url = f'https://news.google.com/search?q={search_term}&hl=en-US&gl=US&ceid=US:en'
+
+    response = http_client.get_cached(url, timeout=15)
+    # Hybrid extraction: Soup + Regex to ensure we miss nothing
+    soup = BeautifulSoup(response.content, 'html.parser')
+    html_str = str(response.content)
+
+    potential_urls = set()
+
+    # Method 1: BS4
+    for link in soup.find_all('a', href=True):
+        href = link['href']
+        if href.startswith('./'):
+            href = href.replace('./', 'https://news.google.com/')
+        potential_urls.add(href)
+
+    # Method 2: Regex (Fallback for weird DOM structures)
+    regex_urls = re.findall(r'https?://news\.google\.com/[^\s<>"]+', html_str)
+    potential_urls.update(regex_urls)
+
+    # Filter for actual articles
+    return [u for u in potential_urls if 'articles' in u or '/read/' in u]
+
 def fetch_content(search_term, strict_filter=True):
     print(f"Searching for news on: {search_term}...")
-    url = f'https://news.google.com/search?q={search_term}&hl=en-US&gl=US&ceid=US:en'
-    
+    http_client.begin_crawl()
+
     try:
-        response = requests.get(url, timeout=15)
-        # Hybrid extraction: Soup + Regex to ensure we miss nothing
-        soup = BeautifulSoup(response.content, 'html.parser')
-        html_str = str(response.content)
-        
-        potential_urls = set()
-        
-        # Method 1: BS4
-        for link in soup.find_all('a', href=True):
-            href = link['href']
-            if href.startswith('./'):
-                href = href.replace('./', 'https://news.google.com/')
-            potential_urls.add(href)
-            
-        # Method 2: Regex (Fallback for weird DOM structures)
-        regex_urls = re.findall(r'https?://news\.google\.com/[^\s<>"]+', html_str)
-        potential_urls.update(regex_urls)
-        
-        # Filter for actual articles
-        article_candidates = []
-        for u in potential_urls:
-            if 'articles' in u or '/read/' in u:
-                article_candidates.append(u)
+        # Structured candidates from the Google News RSS feed; HTML scraping is the fallback.
+        # The feed names each publisher, so excluded sources are dropped before any request.
+        feed = news_discovery.search_news(search_term)
+        if feed:
+            article_candidates = [c['url'] for c in feed if not PUBLISHER_FILTER.is_excluded_domain(c['source_url'])]
+        else:
+            article_candidates = scrape_article_links(search_term)
         
         print(f"Found {len(article_candidates)} potential links. Checking top candidates...")
         
         processed = read_processed_urls()
         
-        count = 0
-        for p_url in article_candidates:
-            if count >= 15: break # Check max 15 links
-            
-            try:
-                # Resolve redirect
-                try:
-                    final_res = requests.get(p_url, timeout=10)
-                    final_url = final_res.url
-                except:
-                    continue
-
-                # Skip exclusions
-                exclude = ['nyt.com', 'wsj.com', 'bloomberg.com', 'youtube.com']
-                if any(x in final_url for x in exclude):
-                    continue
-                
-                if final_url in processed:
-                    continue
-                
-                # Parse
-                article_soup = BeautifulSoup(final_res.content, 'html.parser')
-                title = article_soup.title.string if article_soup.title else ""
-                if not title: continue
-                
-                texts = [p.get_text() for p in article_soup.find_all('p')]
-                text_content = "\n".join(texts)
-                
-                # RELAXED LENGTH CHECK: Only 200 chars needed
-                if len(text_content) < 200: 
-                    continue
-
-                print(f"  > Evaluating: {title[:50]}...")
-                
-                # AI Filter
-                if strict_filter:
-                    if filter_article_with_ai(title, text_content):
-                        return {'title': title, 'text': text_content, 'url': final_url}
-                    else:
-                        print("    - Rejected by AI (Too generic/low quality)")
-                        add_url_to_sheet('processed_urls.csv', final_url) # Don't check again
-                else:
-                    # SUPER PERMISSIVE MODE: Just take it!
-                    print("    - Accepted (Panic Mode Active - Taking First Result)")
-                    return {'title': title, 'text': text_content, 'url': final_url}
-                
-                count += 1
-                
-            except Exception as e:
-                continue
+        def load_candidate(p_url):
+            # Resolve redirect (cached per article ID, no body download)
+            final_url = redirect_cache.resolve(p_url, timeout=10)
+
+            # Skip exclusions
+            if PUBLISHER_FILTER.is_excluded_domain(final_url):
+                return None
+
+            if final_url in processed:
+                return None
+
+            # Download and parse only articles we may actually use
+            article = http_client.fetch_article(final_url, max_chars=4000, timeout=10)
+            if article is None:
+                return None
+            final_url = article['url']
+            title = article['title']
+            if not title: return None
+
+            text_content = article['text']
+
+            # RELAXED LENGTH CHECK: Only 200 chars needed
+            if len(text_content) < 200:
+                return None
+
+            return {'title': title, 'text': text_content, 'url': final_url, 'link_density': article['link_density']}
+
+        if strict_filter:
+            # AI Filter: download every candidate in parallel, then rank them all in one call
+            articles = fetch_all(article_candidates[:15], load_candidate) # Check max 15 links
+            # Cheap local checks first: obvious junk never reaches Gemini
+            articles = prefilter(articles)
+            if not articles:
+                return None
+            scores = score_articles_with_ai(articles)
+            if scores is None:
+                # Scoring failed: keep the old behaviour and allow the best-ranked article
+                return articles[0] if articles else None
+
+            best = None
+            for article, s in zip(articles, scores):
+                print(f"  > {s['score']}/10 {article['title'][:50]}... ({s['reason']})")
+                log_decision('ai', article, s['score'] >= MIN_ARTICLE_SCORE, s['score'], reasons=[s['reason']])
+                if s['score'] < MIN_ARTICLE_SCORE:
+                    add_url_to_sheet('processed_urls.csv', article['url']) # Don't check again
+                elif best is None or s['score'] > best[0]:
+                    best = (s['score'], article)
+            if best is None:
+                print("    - All candidates rejected by AI (Too generic/low quality)")
+                return None
+            return best[1]
+
+        def accept(article):
+            # SUPER PERMISSIVE MODE: Just take it!
+            print(f"  > Evaluating: {article['title'][:50]}...")
+            print("    - Accepted (Panic Mode Active - Taking First Result)")
+            return True
+
+        # Candidates are downloaded in parallel, then evaluated in order
+        return fetch_first(article_candidates[:15], load_candidate, accept) # Check max 15 links
 
     except Exception as e:
         print(f"Fetch error: {e}")
@@ -290,6 +238,7 @@ def fetch_content(search_term, strict_filter=True):
 
 def main():
     print("=== LinkedIn Bot Pro (Autonomous v2) ===")
+    llm.warm(GEMINI_API_KEY)
     
     tm = TopicManager()
     banned_topics = tm.get_banned_topics(days=5)
@@ -324,6 +273,14 @@ def main():
             break
         else:
             print("No suitable content found. Trying next fallback...")
+
+    m = http_client.crawl_metrics()
+    print(f"Network: {m['requests']} requests, {m['queued_s']}s queued, {m['fetching_s']}s fetching")
+    g = llm.limiter_metrics()
+    print(f"Gemini: {g['calls']} calls, {g['retries']} retries, {g['queued_s']}s queued for quota")
+    u = llm.usage_report()
+    print(f"Input tokens: {u['input_tokens']} sent ({u['system_pct']}% static template rules), "
+          f"{u['local_saved_tokens']} not sent thanks to {u['local_hits']} local cache hits")
             
     if not article:
         print("\nCRITICAL: Could not find ANY content after all fallbacks.")
@@ -5,11 +5,12 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
-import google.generativeai as genai
-import pandas as pd
 import os
 from dotenv import load_dotenv
+import llm
+from text_budget import fit_to_budget
+import news_discovery
+from article_extract import extract_article
 
 # Load environment variables
 load_dotenv()
@@ -18,7 +19,8 @@ load_dotenv()
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 if not GEMINI_API_KEY:
     raise ValueError("GEMINI_API_KEY not found in environment variables")
-genai.configure(api_key=GEMINI_API_KEY)
+# Token budget for the article text inside the post prompt
+POST_CONTENT_TOKENS = 150
 
 class LinkedInAutomation:
     def __init__(self, email, password):
@@ -91,11 +93,18 @@ class LinkedInAutomation:
 
     def fetch_ai_trends_from_google(self, search_subject='AI+OR+machine+learning', sheet_path='processed_urls.csv'):
         try:
+            # The RSS feed gives us the top article without rendering the search page
+            candidates = news_discovery.search_news(search_subject, limit=1)
+            if candidates:
+                return candidates[0]['url']
+
+            # Fallback: render the HTML search page in the browser
             url = f'https://news.google.com/search?q={search_subject}&hl=en-US&gl=US&ceid=US:en'
             self.driver.get(url)
             time.sleep(random.uniform(3, 5))
 
-            # Get page source and parse with BeautifulSoup
+            # Get page source and parse with BeautifulSoup (only needed on this fallback)
+            from bs4 import BeautifulSoup
             html = self.driver.page_source
             soup = BeautifulSoup(html, 'html.parser')
             
@@ -117,41 +126,16 @@ class LinkedInAutomation:
             self.driver.get(url)
             time.sleep(random.uniform(3, 5))
             
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-            
-            title = soup.title.string if soup.title else ""
-            article_text = ""
-            for paragraph in soup.find_all('p'):
-                article_text += paragraph.get_text() + "\n"
-
-            # Find the position of the first period after 500 characters
-            end_position = article_text[:500].rfind('.') + 1
-            if end_position == 0:
-                end_position = 500
-            
-            prompt = f"""Based on this article:
-Title: {title}
-Content: {article_text[:end_position]}
-
-Please create an engaging LinkedIn post The post should have a hook,rehook,body,call to action:
-0. Captures attention with a strong opening line
-1. Highlights the key points of the article
-2. Adds professional insights
-3. Uses appropriate hashtags
-4. Includes a call to action
-5. Keeps the length appropriate for LinkedIn (under 1300 characters)
-6. Maintains a professional tone
-7. Don't include source URL
-8. Use a professional tone
-9. Add 'Follow for more AI insights'
-10. Be creative
-11. Add questions to keep people engaged
-Format the post with line breaks and emojis where appropriate."""
-
-            model = genai.GenerativeModel("gemini-1.5-flash")
-            response = model.generate_content(prompt)
+            article = extract_article(self.driver.page_source, max_chars=2000)
             
-            return response.text
+            title = article['title']
+            article_text = article['text']
+
+            # Whole sentences only, redundant ones dropped, within the prompt's token budget
+            summary = fit_to_budget(article_text, POST_CONTENT_TOKENS, summarize=True)
+
+            # Rules are sent as the template's system instruction
+            return llm.generate_from_template('linkedin_post_selenium', model_name="gemini-1.5-flash", title=title, content=summary)
             
         except Exception as e:
             print(f"Error generating LinkedIn post: {str(e)}")
@@ -169,6 +153,7 @@ def main():
     if not all([linkedin_email, linkedin_password]):
         raise ValueError("LinkedIn credentials not found in environment variables")
 
+    llm.warm(GEMINI_API_KEY)
     bot = LinkedInAutomation(linkedin_email, linkedin_password)
     
     try:
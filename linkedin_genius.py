@@ -1,16 +1,26 @@
 import streamlit as st
-import requests
-from bs4 import BeautifulSoup
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import re
-import google.generativeai as genai
-import pandas as pd
-from datetime import datetime
 import json
 import time
 import io
-from PIL import Image, ImageDraw, ImageFont
+import hashlib
+import threading
 import os
 from dotenv import load_dotenv
+import http_client
+import job_runner
+import llm
+import draft_prefetcher
+import topic_service
+from topic_service import TopicManager
+import prompt_templates
+from text_budget import fit_to_budget
+import news_discovery
+import redirect_cache
+from url_classifier import canonical_url, default_classifier
+from url_store import open_store
+from fetcher import fetch_first
 
 # Load environment variables
 load_dotenv()
@@ -24,6 +34,8 @@ st.set_page_config(
 )
 
 # --- CONFIGURATION ---
+# Secrets don't change while the app runs; read them once, not on every rerun
+@st.cache_data(show_spinner=False)
 def get_secret(key, default=None):
     try:
         # st.secrets behaves like a dict but can raise an error if no secrets file exists at all
@@ -38,6 +50,65 @@ def get_secret(key, default=None):
 LINKEDIN_ACCESS_TOKEN = get_secret('LINKEDIN_ACCESS_TOKEN')
 LINKEDIN_AUTHOR_URN = get_secret('LINKEDIN_AUTHOR_URN')
 
+# --- SHARED RESOURCES ---
+# Streamlit re-executes this script on every interaction, a keystroke in the
+# post editor included. Assets are built once per process here. HTTP sessions,
+# Gemini clients, the processed-URL store and the draft prefetcher already
+# live as singletons in their modules, which reruns don't re-import.
+# Background jobs get these objects as arguments: st.cache_* calls belong on
+# the script thread.
+
+# Entries kept per result memo
+MEMO_ENTRIES = 64
+
+class ResultMemo:
+    """Thread-safe memo of pure results under explicit keys, oldest dropped first."""
+
+    def __init__(self, size=MEMO_ENTRIES):
+        self.size = size
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self._items.get(key)
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            while len(self._items) > self.size:
+                self._items.pop(next(iter(self._items)))
+        return value
+
+@st.cache_resource(show_spinner=False)
+def result_memo(kind):
+    """One memo per kind of result (e.g. 'descriptions'), shared by every session."""
+    return ResultMemo()
+
+@st.cache_resource(show_spinner=False)
+def load_quiz_template():
+    """Reference image for Gemini quiz renders, decoded once."""
+    from PIL import Image
+    template_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "quiz_template.png")
+    template = Image.open(template_path)
+    template.load()
+    return template
+
+@st.cache_resource(show_spinner=False)
+def load_quiz_fonts():
+    """Fonts for the Pillow quiz renderer - smaller for fitting more content."""
+    from PIL import ImageFont
+    try:
+        return {
+            'title': ImageFont.truetype("arial.ttf", 28),
+            'question': ImageFont.truetype("arial.ttf", 18),
+            'code': ImageFont.truetype("consola.ttf", 14),
+            'option': ImageFont.truetype("arial.ttf", 16),
+        }
+    except OSError:
+        default = ImageFont.load_default()
+        return {'title': default, 'question': default, 'code': default, 'option': default}
+
 # --- UI SETTINGS (SIDEBAR) ---
 with st.sidebar:
     st.markdown("## ⚙️ Settings")
@@ -51,197 +122,241 @@ with st.sidebar:
     # Use UI key if provided, else fallback to secrets
     GEMINI_API_KEY = ui_api_key if ui_api_key else get_secret('GEMINI_API_KEY')
 
-    if GEMINI_API_KEY:
-        genai.configure(api_key=GEMINI_API_KEY)
-    else:
+    # Per-session key; the shared client for it is built on the first Gemini call
+    # (not on page load, which would import google.genai) and reused across reruns
+    llm.use_api_key(GEMINI_API_KEY)
+    if not GEMINI_API_KEY:
         st.warning("⚠️ Gemini API Key is missing. Please enter it above or add it to your secrets.")
 
+    # Cached answers make reruns and retries free; untick to always get a new variant
+    REUSE_AI_RESPONSES = st.checkbox(
+        "♻️ Reuse cached AI responses",
+        value=True,
+        help="Untick to ask Gemini for a fresh variant even if this exact request was answered before."
+    )
+    STREAM_AI_OUTPUT = st.checkbox(
+        "⚡ Stream AI output",
+        value=True,
+        help="Show the post as Gemini writes it instead of waiting for the full text."
+    )
+    POST_VARIANTS = st.number_input(
+        "🎲 Variants per post",
+        min_value=1, max_value=4, value=1,
+        help="Write several alternative posts in parallel and pick one in the preview."
+    )
+    ai_cache = llm.cache_stats()
+    st.caption(f"AI cache: {ai_cache['hits']} hits / {ai_cache['misses']} misses ({ai_cache['hit_rate']:.0%} hit rate)")
+    gemini = llm.limiter_metrics()
+    st.caption(f"Gemini: {gemini['calls']} calls, {gemini['retries']} retries, {gemini['queued_s']}s queued for quota")
+    usage = llm.usage_report()
+    st.caption(f"Input tokens: {usage['input_tokens']} sent ({usage['system_pct']}% static template rules) · "
+               f"{usage['local_saved_tokens']} not sent thanks to {usage['local_hits']} local cache hits")
+
 
 # --- UTILS ---
 
 def get_trending_tech_topic():
-    model = genai.GenerativeModel("gemini-2.5-flash")
-    prompt = f"""
-    Give me one trending technical specific search term for Google News related to AI, Tech, or Finance for today ({datetime.now().strftime('%Y-%m-%d')}). 
-    Output ONLY the search term. No quotes.
-    """
-    try:
-        response = model.generate_content(prompt)
-        return response.text.strip().replace('"', '').replace("'", "")
-    except:
-        return "Artificial Intelligence News"
+    # Served from the cached topic pool; only a stale or used-up pool costs a Gemini call
+    return topic_service.next_topic(TopicManager().get_banned_topics(days=5))
 
 def read_processed_urls(sheet_path='processed_urls.csv'):
-    try:
-        df = pd.read_csv(sheet_path)
-        return set(df['url'].tolist())
-    except FileNotFoundError:
-        return set()
+    return open_store(sheet_path)
 
 def add_url_to_sheet(url, sheet_path='processed_urls.csv'):
-    clean_url = url.split('?')[0].split('#')[0].rstrip('/')
-    df = pd.DataFrame({'url': [clean_url]})
-    try:
-        pd.read_csv(sheet_path)
-        df.to_csv(sheet_path, mode='a', header=False, index=False)
-    except FileNotFoundError:
-        df.to_csv(sheet_path, mode='w', header=True, index=False)
+    clean_url = canonical_url(url)
+    open_store(sheet_path).add(clean_url)
 
-def fetch_article_content(topic):
+def scrape_search_page(topic, processed_urls):
+    """Fallback discovery: pulls article URLs out of the Google News HTML search page."""
+    # Only the fallback path parses HTML, so bs4 is loaded here rather than at startup
+    from bs4 import BeautifulSoup
     search_query = topic.replace(' ', '+')
     url = f'https://news.google.com/search?q={search_query}&hl=en-US&gl=US&ceid=US:en'
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+    # Browser User-Agent comes from the shared session's default headers
+    response = http_client.get_cached(url, timeout=10)
+    soup = BeautifulSoup(response.content, 'html.parser')
+
+    # Robust Regex Extraction from Bot Auto
+    html_content = str(soup)
+    https_urls = re.findall(r'https?://[^\s<>"]+', html_content, re.IGNORECASE)
+
+    # One pass over the page: keyword matches first, generic article links as the
+    # Panic Mode fallback. Patterns are compiled once in url_classifier.
+    return default_classifier.select(https_urls, processed_urls)
+
+# Pages with less extracted text than this (paywalls, video pages) are skipped
+MIN_ARTICLE_CHARS = 200
+
+def find_article(topic):
+    """
+    Newest unprocessed article for `topic`, or None. No Streamlit calls, so it
+    also runs in the background; callers start the crawl run it counts against.
+    """
+    processed_urls = read_processed_urls()
+
+    # Structured candidates from the Google News RSS feed; HTML scraping is the fallback
+    job_runner.report(0.2, f"Searching news for '{topic}'...")
+    relevant_urls = [c['url'] for c in news_discovery.search_news(topic)]
+    if not relevant_urls:
+        relevant_urls = scrape_search_page(topic, processed_urls)
+    job_runner.report(0.5, f"Reading {len(relevant_urls)} candidate articles...")
+
+    # Pick the first good one (candidates are downloaded in parallel)
+    def load_article(target_url):
+        # RSS links point at news.google.com, so resolve before checking history
+        target_url = redirect_cache.resolve(target_url)
+        if canonical_url(target_url) in processed_urls:
+            return None
+
+        # Streams the page and stops once the summary budget is filled
+        article = http_client.fetch_article(target_url, max_chars=2000, timeout=10) # Keep summary for Gemini
+        if article is None or len(article['text']) < MIN_ARTICLE_CHARS:
+            return None
+
+        return {
+            'title': article['title'] or "News",
+            'text': article['text'],
+            'url': article['url']
+        }
+
+    return fetch_first(relevant_urls, load_article)
+
+def search_article(topic=None):
+    """Job: picks a trending topic if none is given, then finds an article for it."""
+    # Each search gets its own request budget and network counters
+    crawl = http_client.begin_crawl()
+    if topic is None:
+        job_runner.report(0.05, "Picking a trending topic...")
+        topic = get_trending_tech_topic()
+    article = find_article(topic)
+    return {'topic': topic, 'article': article, 'network': http_client.crawl_metrics(crawl)}
+
+def describe_image(image_bytes, instruction, memo, fresh=False):
+    """Job: Gemini vision description of an uploaded image (bytes are passed back for publishing)."""
+    # The same upload and instruction reuse a description unless a fresh one is
+    # asked for; the fresh answer still replaces the memoized one
+    key = (hashlib.sha256(image_bytes).hexdigest(), instruction)
+    description = None if fresh else memo.get(key)
+    if description is None:
+        job_runner.report(0.2, "Analyzing image...")
+        from PIL import Image
+        image = Image.open(io.BytesIO(image_bytes))
+        response = llm.get_model("gemini-2.5-flash").generate_content([instruction, image])
+        description = memo.put(key, response.text)
+    return {'description': description, 'image_bytes': image_bytes}
+
+def prepare_trend_draft():
+    """Background producer for Trend Hunter: topic, article and post text, ready to publish."""
+    http_client.begin_crawl()
+    topic = get_trending_tech_topic()
+    article = find_article(topic)
+    if not article:
+        return None
+    prompt, config = build_post_prompt(article, type="article")
+    return {
+        'topic': topic,
+        'article': article,
+        'text': llm.generate_text(prompt, generation_config=config),
+        'url': canonical_url(article['url'])
     }
-    
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Robust Regex Extraction from Bot Auto
-        html_content = str(soup)
-        https_urls = re.findall(r'https?://[^\s<>"]+', html_content, re.IGNORECASE)
-        
-        exclude_patterns = [
-            'gstatic.com', 'googleusercontent.com', 'google.com/search', 'google.com/url',
-            'accounts.google.com', 'play.google.com', 'blogger.googleusercontent.com',
-            'cdn-apple.com', 'cloudfront.net', 'springernature.com', 'b-cdn.net',
-            'transforms.svdcdn.com', 'contentstack.com', '.jpg', '.jpeg', '.png', '.gif', 
-            '.webp', '.ico', 'favicon', 'image', '/img/', '/images/', 'media.', 
-            'thumbnail', 'storage.googleapis.com', 'lh3.googleusercontent.com', 
-            'accounts.', 'login.', 'auth.', 'amp/', '.amp', 'rss/', 'feed/', 
-            'signup', 'subscribe', 'advertisement', 'analytics'
-        ]
-        
-        processed_urls = read_processed_urls()
-        relevant_urls = []
-        seen_urls = set()
-        
-        # Keyword filtering
-        keywords = ['ai', 'artificial-intelligence', 'machine-learning', 'tech', 'finance', 'crypto', 'robotics']
-        
-        for url in https_urls:
-            if any(pattern in url.lower() for pattern in exclude_patterns):
-                continue
-            if any(kw in url.lower() for kw in keywords):
-                clean_url = url.split('?')[0].split('#')[0].rstrip('/')
-                if clean_url not in seen_urls and clean_url not in processed_urls:
-                    seen_urls.add(clean_url)
-                    relevant_urls.append(url)
-        
-        # Panic Mode Fallback
-        if not relevant_urls:
-            for url in https_urls:
-                if any(pattern in url.lower() for pattern in exclude_patterns): continue
-                if '/read/' in url or 'articles' in url:
-                    clean_url = url.split('?')[0].split('#')[0].rstrip('/')
-                    if clean_url not in seen_urls and clean_url not in processed_urls:
-                        relevant_urls.append(url)
-        
-        # Pick the first good one
-        for target_url in relevant_urls:
-            try:
-                res = requests.get(target_url, headers=headers, timeout=10)
-                if res.status_code == 200:
-                    article_soup = BeautifulSoup(res.content, 'html.parser')
-                    title = article_soup.title.string if article_soup.title else "News"
-                    texts = [p.get_text() for p in article_soup.find_all(['p', 'div'])]
-                    content = "\n".join(texts)
-                    
-                    return {
-                        'title': title, 
-                        'text': content[:2000], # Keep summary for Gemini
-                        'url': res.url
-                    }
-            except:
-                continue
-                
-    except Exception as e:
-        st.error(f"Fetch Error: {e}")
-        
-    return None
 
-def generate_post_text(content, type="article", quiz_data=None):
-    model = genai.GenerativeModel("gemini-2.5-flash")
-    prompt = ""
-    
+def show_crawl_metrics(m):
+    """Shows how long one search (its crawl_metrics) spent queued behind the per-host limits vs fetching."""
+    st.caption(f"Network: {m['requests']} requests · {m['queued_s']}s queued · {m['fetching_s']}s fetching")
+
+# Token budget for the article text inside the post prompt
+ARTICLE_PROMPT_TOKENS = 250
+
+def build_post_prompt(content, type="article", quiz_data=None):
+    """Returns (prompt, generation_config) for a post of the given type."""
+    # Static rules travel as the template's system instruction; only these fields change per call
     if type == "article":
-        prompt = f"""Act as a LinkedIn Influencer. Write a VIRAL post based on this news:
-        Title: {content['title']}
-        Content Preview: {content['text'][:1000]}
-        
-        The post MUST follow this structure:
-        0. Hook: Captures attention with a strong opening line.
-        1. Rehook: Keeps them reading.
-        2. Body: Highlights key points + professional insights.
-        3. Question: Ask something to drive engagement.
-        4. CTA: "Follow me for more on AI and Tech news!"
-        5. Hashtags: Use 3-5 relevant hashtags.
-        
-        Rules:
-        - Max 1300 chars.
-        - Professional yet creative tone.
-        - Don't include the source URL in the text.
-        - Don't say "My latest article", talk about the news in general.
-        - Use line breaks and emojis.
-        - Return ONLY the post text.
-        """
+        prompt, config = prompt_templates.render(
+            'post_article',
+            title=content['title'],
+            content=fit_to_budget(content['text'], ARTICLE_PROMPT_TOKENS, summarize=True)
+        )
     elif type == "image":
-        prompt = f"""
-        Act as a LinkedIn Influencer. Write a VIRAL post based on this image description:
-        Description: {content}
-        
-        Rules:
-        - Hook: Relate the image to a broader professional lesson.
-        - Insight + Question + Hashtags.
-        - Max 1200 chars.
-        - No "Here is a post".
-        """
+        prompt, config = prompt_templates.render('post_image', description=content)
     elif type == "quiz":
-        prompt = f"""
-        Act as a LinkedIn Influencer. Write an ENGAGING post to accompany this quiz challenge:
-        Category: {quiz_data['category']}
-        Question: {quiz_data['question']}
-        Options: {quiz_data['options']}
-        
-        Rules:
-        - Start with a hook like "Can you solve this?" or "Test your skills!"
-        - Challenge followers to comment their answer (A, B, C, or D)
-        - Promise to reveal the answer in comments or next post
-        - Use relevant hashtags (#{quiz_data['category'].replace(' ', '')} #TechQuiz #CodingChallenge)
-        - Max 800 chars.
-        - No "Here is a post".
-        """
-        
+        prompt, config = prompt_templates.render(
+            'post_quiz',
+            category=quiz_data['category'],
+            question=quiz_data['question'],
+            options=quiz_data['options'],
+            category_tag=quiz_data['category'].replace(' ', '')
+        )
+    return prompt, config
+
+def generate_post_text(content, type="article", quiz_data=None, fresh=False, stream=False, variants=1):
+    prompt, config = build_post_prompt(content, type, quiz_data)
+    # Alternatives from an earlier generation no longer apply
+    st.session_state['post_variants'] = []
+    if variants > 1:
+        return generate_post_variants(prompt, variants, config, fresh=fresh)
+    if stream:
+        return stream_into_preview(llm.stream_text(prompt, generation_config=config, fresh=fresh))
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        return llm.generate_text(prompt, generation_config=config, fresh=fresh)
+    except llm.QuotaExceeded as e:
+        st.error(f"🚀 API Quota reached (Rate Limit). Please wait {e.retry_after:.0f} seconds and try again.")
     except Exception as e:
-        if "429" in str(e) or "ResourceExhausted" in str(e):
-            st.error("🚀 API Quota reached (Rate Limit). Please wait 60 seconds and try again.")
-        return f"Error generating post: {e}"
+        st.error(f"Post generation failed: {e}")
+    return None
 
-def refine_post_with_ai(current_text, instructions):
-    """Refine the generated post using AI based on user instructions."""
-    model = genai.GenerativeModel("gemini-2.5-flash")
-    prompt = f"""
-    Refine this LinkedIn post based on the following instructions:
-    
-    Current Post:
-    {current_text}
-    
-    Instructions:
-    {instructions}
-    
-    Rules:
-    - Maintain a professional and engaging LinkedIn tone.
-    - Return ONLY the updated post text.
-    - Do not include any explanations, intros, or conversational filler.
-    - Preserve the overall structure (Hook, Rehook, Body, Question, CTA, Hashtags).
+def generate_post_variants(prompt, k, config=None, fresh=False):
+    """
+    Writes `k` alternative posts in parallel (one call's wall-clock time, within
+    the Gemini rate limits). The alternatives are kept for the preview's picker;
+    returns the first one.
+    """
+    try:
+        with st.spinner(f"Writing {k} variants in parallel..."):
+            texts = llm.generate_variants(prompt, k, generation_config=config, fresh=fresh)
+    except llm.QuotaExceeded as e:
+        st.error(f"🚀 API Quota reached (Rate Limit). Please wait {e.retry_after:.0f} seconds and try again.")
+        return None
+    except Exception as e:
+        st.error(f"Post generation failed: {e}")
+        return None
+    if not texts:
+        return None
+    st.session_state['post_variants'] = texts
+    st.session_state['variants_version'] = st.session_state.get('variants_version', 0) + 1
+    return texts[0]
+
+def stream_into_preview(chunks):
     """
+    Renders streamed text live in a draft box, then clears the box.
+    Returns the full text, or None if the stream failed.
+    """
+    placeholder = st.empty()
+    text = None
+    try:
+        with placeholder.container(border=True):
+            st.caption("✍️ Writing...")
+            text = st.write_stream(chunks)
+    except llm.QuotaExceeded as e:
+        st.error(f"🚀 API Quota reached (Rate Limit). Please wait {e.retry_after:.0f} seconds and try again.")
+    except Exception as e:
+        st.error(f"Post generation failed: {e}")
+    placeholder.empty()
+    return text if isinstance(text, str) and text.strip() else None
+
+def commit_generated_post(post):
+    """Stores a finished post and bumps the editor version so the text area shows it."""
+    st.session_state['generated_post'] = post
+    st.session_state['editor_version'] = st.session_state.get('editor_version', 0) + 1
+
+def refine_post_with_ai(current_text, instructions, fresh=False, stream=False):
+    """Refine the generated post using AI based on user instructions."""
+    prompt, config = prompt_templates.render('refine_post', post=current_text, instructions=instructions)
+    if stream:
+        refined = stream_into_preview(llm.stream_text(prompt, generation_config=config, fresh=fresh))
+        return refined.strip() if refined else current_text
     try:
-        response = model.generate_content(prompt)
-        return response.text.strip()
+        return llm.generate_text(prompt, generation_config=config, fresh=fresh).strip()
     except Exception as e:
         st.error(f"Refinement failed: {e}")
         return current_text
@@ -263,20 +378,18 @@ def upload_image_to_linkedin(image_bytes, mime_type="image/jpeg"):
         }
     }
     
-    reg_resp = requests.post(register_url, headers=headers, json=register_data)
+    reg_resp = http_client.post(register_url, headers=headers, json=register_data)
     if reg_resp.status_code != 200:
-        st.error(f"Image Register Failed: {reg_resp.text}")
-        return None
+        raise RuntimeError(f"Image Register Failed: {reg_resp.text}")
         
     upload_data = reg_resp.json()
     upload_url = upload_data['value']['uploadMechanism']['com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest']['uploadUrl']
     asset_urn = upload_data['value']['asset']
     
-    upload_resp = requests.put(upload_url, data=image_bytes, headers={'Content-Type': 'application/octet-stream'})
+    upload_resp = http_client.put(upload_url, data=image_bytes, headers={'Content-Type': 'application/octet-stream'})
     
     if upload_resp.status_code not in [200, 201]:
-        st.error(f"Image Upload Failed: {upload_resp.status_code}")
-        return None
+        raise RuntimeError(f"Image Upload Failed: {upload_resp.status_code}")
         
     return asset_urn
 
@@ -312,14 +425,13 @@ def post_to_linkedin_api(text, asset_urn=None):
         "visibility": {"com.linkedin.ugc.MemberNetworkVisibility": "PUBLIC"}
     }
     
-    resp = requests.post(api_url, headers=headers, json=post_data)
+    resp = http_client.post(api_url, headers=headers, json=post_data)
     return resp.status_code == 201
 
 # --- QUIZ FUNCTIONS ---
 
-def generate_quiz_question(category):
+def generate_quiz_question(category, fresh=False):
     """Generate a quiz question with 4 options using Gemini."""
-    model = genai.GenerativeModel("gemini-2.5-flash")
     
     prompt = f"""
     Create a challenging but fair multiple-choice quiz question for {category}.
@@ -341,22 +453,16 @@ def generate_quiz_question(category):
     If no code is needed, set "code" to empty string.
     """
     
-    try:
-        response = model.generate_content(prompt)
-        text = response.text.strip()
-        # Clean up markdown if present
-        if "```json" in text:
-            text = text.split("```json")[1].split("```")[0]
-        elif "```" in text:
-            text = text.split("```")[1].split("```")[0]
-        return json.loads(text)
-    except Exception as e:
-        st.error(f"Quiz generation error: {e}")
-        return None
+    text = llm.generate_text(prompt, fresh=fresh).strip()
+    # Clean up markdown if present
+    if "```json" in text:
+        text = text.split("```json")[1].split("```")[0]
+    elif "```" in text:
+        text = text.split("```")[1].split("```")[0]
+    return json.loads(text)
 
-def create_quiz_image(quiz_data, category):
+def create_quiz_image(quiz_data, category, template_image, fonts):
     """Create a styled quiz image using Gemini with reference template."""
-    import os
     
     # Build the quiz content for the prompt
     question = quiz_data.get('question', 'Test your knowledge')
@@ -389,24 +495,8 @@ def create_quiz_image(quiz_data, category):
     """
     
     try:
-        from google import genai
-        from google.genai import types
-        
-        # Get the template image path
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        template_path = os.path.join(script_dir, "quiz_template.png")
-        
-        # Load the reference image
-        template_image = Image.open(template_path)
-        
-        # Create client
-        client = genai.Client(api_key=GEMINI_API_KEY)
-        
         # Generate image using the template as reference
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=[prompt, template_image],
-        )
+        response = llm.get_model("gemini-2.5-flash").generate_content([prompt, template_image])
         
         # Extract the generated image
         for part in response.parts:
@@ -420,12 +510,15 @@ def create_quiz_image(quiz_data, category):
         raise Exception("No image in response")
             
     except Exception as e:
-        st.warning(f"Gemini image generation failed ({e}). Using Pillow fallback...")
-        return create_quiz_image_pillow(quiz_data, category)
+        # Runs as a background job, so the fallback is reported through the job
+        print(f"Gemini image generation failed ({e}). Using Pillow fallback...")
+        job_runner.report(message="Gemini image generation failed. Using Pillow fallback...")
+        return create_quiz_image_pillow(quiz_data, category, fonts)
 
-def create_quiz_image_pillow(quiz_data, category):
+def create_quiz_image_pillow(quiz_data, category, fonts):
     """Create a styled quiz image using Pillow with proper text handling."""
     import textwrap
+    from PIL import Image, ImageDraw
     
     width = 1000  # Wider for longer code lines
     
@@ -436,17 +529,11 @@ def create_quiz_image_pillow(quiz_data, category):
     code_bg = (40, 42, 54)
     option_colors = [(255, 87, 87), (87, 255, 87), (87, 180, 255), (255, 255, 87)]
     
-    # Load fonts - smaller for fitting more content
-    try:
-        title_font = ImageFont.truetype("arial.ttf", 28)
-        question_font = ImageFont.truetype("arial.ttf", 18)
-        code_font = ImageFont.truetype("consola.ttf", 14)
-        option_font = ImageFont.truetype("arial.ttf", 16)
-    except:
-        title_font = ImageFont.load_default()
-        question_font = ImageFont.load_default()
-        code_font = ImageFont.load_default()
-        option_font = ImageFont.load_default()
+    # Fonts are loaded once per process (load_quiz_fonts)
+    title_font = fonts['title']
+    question_font = fonts['question']
+    code_font = fonts['code']
+    option_font = fonts['option']
     
     # Get content
     question = quiz_data.get('question', 'Question not found')
@@ -521,6 +608,70 @@ def create_quiz_image_pillow(quiz_data, category):
     img.save(img_byte_arr, format='PNG')
     return img_byte_arr.getvalue(), img
 
+def build_quiz(category, template_image, fonts):
+    """Job: a new quiz question plus its rendered image."""
+    job_runner.report(0.1, f"Writing a {category} question...")
+    # Each run asks for a new question; the answer is still stored in the cache
+    quiz_data = generate_quiz_question(category, fresh=True)
+    quiz_data['category'] = category
+    job_runner.report(0.4, "Rendering the quiz image...")
+    image_bytes, pil_image = create_quiz_image(quiz_data, category, template_image, fonts)
+    return {'quiz_data': quiz_data, 'image_bytes': image_bytes, 'image': pil_image}
+
+# --- BACKGROUND JOBS ---
+
+# Seconds between progress checks of a running job
+JOB_POLL_S = 1.0
+
+def session_id():
+    """Id of the browser session running this script."""
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else 'local'
+
+def start_job(name, fn, *args, label='', **kwargs):
+    """Runs `fn(*args, **kwargs)` on the worker pool; a click while the same job runs doesn't start another."""
+    return job_runner.get_runner().submit(session_id(), name, fn, *args, label=label, **kwargs)
+
+@st.fragment(run_every=JOB_POLL_S)
+def show_job_progress(name):
+    """Progress bar and Cancel button of a running job; reruns the page once the job ends."""
+    job = job_runner.get_runner().get(session_id(), name)
+    if job is None or job.done:
+        st.rerun()
+    st.progress(job.progress, text=job.message)
+    if st.button("Cancel", key=f"cancel_job_{name}"):
+        job.cancel()
+        st.rerun()
+
+def take_job(name):
+    """
+    Result of the session's `name` job, returned once after it finishes, else
+    None. A running job shows its progress instead, so widgets stay usable and
+    reruns don't restart it. Failures and cancellations are reported here.
+    """
+    runner = job_runner.get_runner()
+    job = runner.get(session_id(), name)
+    if job is None:
+        return None
+    if not job.done:
+        show_job_progress(name)
+        return None
+    job = runner.claim(session_id(), name)
+    if job is None:
+        return None
+    what = job.label.rstrip('.')
+    if job.status == job_runner.CANCELLED:
+        st.info(f"{what} cancelled.")
+    elif isinstance(job.error, llm.QuotaExceeded):
+        st.error(f"🚀 API Quota reached (Rate Limit). Please wait {job.error.retry_after:.0f} seconds and try again.")
+    elif job.status == job_runner.FAILED:
+        st.error(f"{what} failed: {job.error}")
+    return job.result
+
+def pick_variant(picker_key):
+    """Radio callback: loads the chosen variant into the editor."""
+    commit_generated_post(st.session_state['post_variants'][st.session_state[picker_key]])
+
 def show_post_preview(image=None, image_bytes=None):
     """Display a LinkedIn-style preview of the post.
     Edits are automatically saved to st.session_state['generated_post']
@@ -549,6 +700,18 @@ def show_post_preview(image=None, image_bytes=None):
         elif image is not None:
             st.image(image, use_container_width=True)
         
+        # Pick between parallel variants (replaces the editor content)
+        variants = st.session_state.get('post_variants') or []
+        if len(variants) > 1:
+            st.radio(
+                "Choose a variant",
+                options=range(len(variants)),
+                format_func=lambda i: f"Variant {i + 1}: {variants[i].strip().splitlines()[0][:80]}",
+                key=f"variant_pick_v{st.session_state.get('variants_version', 0)}",
+                on_change=pick_variant,
+                args=(f"variant_pick_v{st.session_state.get('variants_version', 0)}",)
+            )
+        
         # Show post text - Capture manual edits
         st.markdown(f"**📝 Edit your post text:**")
         # Use a versioned key to force a widget reset when AI updates the text
@@ -570,6 +733,8 @@ def show_post_preview(image=None, image_bytes=None):
     st.markdown("### ✨ AI Refinement")
     with st.expander("🪄 Ask AI to rewrite or adjust this post", expanded=False):
         refine_col1, refine_col2 = st.columns([4, 1])
+        # Full-width area below the inputs where a streamed rewrite is shown
+        refine_output = st.container()
         with refine_col1:
             instructions = st.text_input(
                 "Comment/Instruction for AI", 
@@ -580,14 +745,12 @@ def show_post_preview(image=None, image_bytes=None):
             st.write("") # Padding
             if st.button("Change", type="primary", use_container_width=True):
                 if instructions:
-                    with st.spinner("AI is rewriting your post..."):
+                    with st.spinner("AI is rewriting your post..."), refine_output:
                         current_text = st.session_state.get('generated_post', "")
-                        refined_text = refine_post_with_ai(current_text, instructions)
+                        refined_text = refine_post_with_ai(current_text, instructions, fresh=not REUSE_AI_RESPONSES, stream=STREAM_AI_OUTPUT)
                         
-                        # Update the post content
-                        st.session_state['generated_post'] = refined_text
-                        # Bump the version to force the text_area widget to refresh
-                        st.session_state['editor_version'] += 1
+                        # Update the post content and force the text_area widget to refresh
+                        commit_generated_post(refined_text)
                         st.rerun()
                 else:
                     st.warning("Please enter an instruction first.")
@@ -612,19 +775,46 @@ if option == "🚀 Auto Trend Hunter":
     st.header("Mode 1: Trend Hunter")
     st.info("Finds a trending tech topic, reads news, and writes a text-only post.")
     
-    if st.button("Find Trend & Generate"):
-        with st.status("Hunting for trends..."):
-            topic = get_trending_tech_topic()
-            st.write(f"Topic: **{topic}**")
-            
-            article = fetch_article_content(topic)
+    # Finished drafts are prepared in the background so a click can return one at once
+    prefetcher = None
+    if GEMINI_API_KEY:
+        prefetcher = draft_prefetcher.get_prefetcher(
+            GEMINI_API_KEY, prepare_trend_draft,
+            lambda url: url in read_processed_urls()
+        )
+        st.caption(f"⚡ {prefetcher.ready()} draft(s) ready")
+    
+    clicked = st.button("Find Trend & Generate")
+    draft = None
+    # Prefetched drafts are single posts; asking for variants takes the live path
+    if clicked and prefetcher and POST_VARIANTS == 1:
+        draft = prefetcher.take()
+        if draft:
+            st.session_state['post_variants'] = []
+            commit_generated_post(draft['text'])
+            st.session_state['post_type'] = 'text'
+            st.session_state['article_url'] = draft['article']['url']
+            st.success(f"Ready draft on **{draft['topic']}**: {draft['article']['title']}")
+    
+    if clicked and not draft:
+        start_job('trend_article', search_article, label="Hunting for trends...")
+    
+    found = take_job('trend_article')
+    if found:
+        article = found['article']
+        with st.status("Hunting for trends...", state="complete"):
+            st.write(f"Topic: **{found['topic']}**")
+            show_crawl_metrics(found['network'])
             if not article:
                 st.warning("No new/unprocessed articles found for this topic. Try another search or wait for news to update.")
             else:
                 st.write(f"Article: {article['title']}")
-                
-                post = generate_post_text(article, type="article")
-                st.session_state['generated_post'] = post
+        
+        # Generated outside the status box so a streamed post is visible while it's written
+        if article:
+            post = generate_post_text(article, type="article", fresh=not REUSE_AI_RESPONSES, stream=STREAM_AI_OUTPUT, variants=POST_VARIANTS)
+            if post:
+                commit_generated_post(post)
                 st.session_state['post_type'] = 'text'
                 st.session_state['article_url'] = article['url']
     
@@ -652,20 +842,27 @@ elif option == "🔍 Manual Topic Scout":
     
     if st.button("Search & Generate"):
         if manual_topic:
-            with st.status(f"Searching for '{manual_topic}'..."):
-                article = fetch_article_content(manual_topic)
-                if not article:
-                    st.warning("No new/unprocessed articles found for this topic. Try another search or wait for news to update.")
-                else:
-                    st.write(f"Article: {article['title']}")
-                    
-                    post = generate_post_text(article, type="article")
-                    st.session_state['generated_post'] = post
-                    st.session_state['post_type'] = 'manual'
-                    st.session_state['article_url'] = article['url']
+            start_job('scout_article', search_article, manual_topic, label=f"Searching for '{manual_topic}'...")
         else:
             st.error("Please enter a subject first.")
     
+    found = take_job('scout_article')
+    if found:
+        article = found['article']
+        with st.status(f"Searching for '{found['topic']}'...", state="complete"):
+            show_crawl_metrics(found['network'])
+            if not article:
+                st.warning("No new/unprocessed articles found for this topic. Try another search or wait for news to update.")
+            else:
+                st.write(f"Article: {article['title']}")
+        
+        if article:
+            post = generate_post_text(article, type="article", fresh=not REUSE_AI_RESPONSES, stream=STREAM_AI_OUTPUT, variants=POST_VARIANTS)
+            if post:
+                commit_generated_post(post)
+                st.session_state['post_type'] = 'manual'
+                st.session_state['article_url'] = article['url']
+    
     if 'generated_post' in st.session_state and st.session_state.get('post_type') == 'manual':
         st.session_state['generated_post'] = str(st.session_state['generated_post'])
         show_post_preview()
@@ -688,36 +885,37 @@ elif option == "👁️ Visual Storyteller":
     uploaded_file = st.file_uploader("Upload Image", type=['jpg', 'png', 'jpeg', 'JFIF', 'GIF'])
     
     if uploaded_file is not None:
-        image = Image.open(uploaded_file)
-        
         if st.button("Analyze & Write"):
-            with st.spinner("Analyzing image..."):
-                model = genai.GenerativeModel("gemini-2.5-flash")
-                response = model.generate_content(["Describe this image in detail for a professional audience.", image])
-                description = response.text
-                
-                post = generate_post_text(description, type="image")
-                
-                st.session_state['generated_post'] = post
-                st.session_state['post_type'] = 'image'
-                # Use raw bytes for LinkedIn upload to preserve animations (GIFs)
-                st.session_state['image_data'] = uploaded_file.getvalue()
-                # Store for preview
-                st.session_state['preview_image_bytes'] = uploaded_file.getvalue()
+            start_job('describe_story', describe_image, uploaded_file.getvalue(),
+                      "Describe this image in detail for a professional audience.", result_memo('descriptions'),
+                      fresh=not REUSE_AI_RESPONSES, label="Analyzing image...")
+    
+    described = take_job('describe_story')
+    if described:
+        post = generate_post_text(described['description'], type="image", fresh=not REUSE_AI_RESPONSES, stream=STREAM_AI_OUTPUT, variants=POST_VARIANTS)
+        
+        if post:
+            commit_generated_post(post)
+            st.session_state['post_type'] = 'image'
+            # Use raw bytes for LinkedIn upload to preserve animations (GIFs)
+            st.session_state['image_data'] = described['image_bytes']
+            # Store for preview
+            st.session_state['preview_image_bytes'] = described['image_bytes']
 
     if 'generated_post' in st.session_state and st.session_state.get('post_type') == 'image':
         st.session_state['generated_post'] = str(st.session_state['generated_post'])
         show_post_preview(image_bytes=st.session_state.get('preview_image_bytes'))
         
         if st.button("🚀 Publish (Image + Text)"):
-            with st.spinner("Uploading..."):
-                asset_urn = upload_image_to_linkedin(st.session_state['image_data'])
-                if asset_urn:
-                    if post_to_linkedin_api(st.session_state['generated_post'], asset_urn=asset_urn):
-                        st.success("Published Successfully!")
-                        del st.session_state['generated_post']
-                    else:
-                        st.error("Post creation failed.")
+            start_job('upload_story', upload_image_to_linkedin, st.session_state['image_data'], label="Uploading...")
+        
+        asset_urn = take_job('upload_story')
+        if asset_urn:
+            if post_to_linkedin_api(st.session_state['generated_post'], asset_urn=asset_urn):
+                st.success("Published Successfully!")
+                del st.session_state['generated_post']
+            else:
+                st.error("Post creation failed.")
 
 elif option == "✨ Creative Remix":
     st.header("Mode 3: Creative Remix")
@@ -726,33 +924,36 @@ elif option == "✨ Creative Remix":
     uploaded_file = st.file_uploader("Upload Source Image", type=['jpg', 'png', 'jpeg', 'JFIF', 'GIF'])
     
     if uploaded_file is not None:
-        image = Image.open(uploaded_file)
-        st.image(image, caption='Source Image', width=300)
+        st.image(uploaded_file, caption='Source Image', width=300)
         
         if st.button("Remix & Generate"):
-            with st.spinner("Analyzing and creating post..."):
-                vision_model = genai.GenerativeModel("gemini-2.5-flash")
-                desc_response = vision_model.generate_content(["Describe the visual composition, subject, and mood of this image.", image])
-                prompt_description = desc_response.text
-                
-                post = generate_post_text(prompt_description, type="image")
-                st.session_state['generated_post'] = post
-                st.session_state['post_type'] = 'remix'
-                # Use raw bytes for LinkedIn upload
-                st.session_state['image_data'] = uploaded_file.getvalue()
-                # Store for preview
-                st.session_state['preview_image_bytes'] = uploaded_file.getvalue()
+            start_job('describe_remix', describe_image, uploaded_file.getvalue(),
+                      "Describe the visual composition, subject, and mood of this image.", result_memo('descriptions'),
+                      fresh=not REUSE_AI_RESPONSES, label="Analyzing image...")
+    
+    described = take_job('describe_remix')
+    if described:
+        post = generate_post_text(described['description'], type="image", fresh=not REUSE_AI_RESPONSES, stream=STREAM_AI_OUTPUT, variants=POST_VARIANTS)
+        if post:
+            commit_generated_post(post)
+            st.session_state['post_type'] = 'remix'
+            # Use raw bytes for LinkedIn upload
+            st.session_state['image_data'] = described['image_bytes']
+            # Store for preview
+            st.session_state['preview_image_bytes'] = described['image_bytes']
 
     if 'generated_post' in st.session_state and st.session_state.get('post_type') == 'remix':
         st.session_state['generated_post'] = str(st.session_state['generated_post'])
         show_post_preview(image_bytes=st.session_state.get('preview_image_bytes'))
         
         if st.button("🚀 Publish Remix"):
-            asset_urn = upload_image_to_linkedin(st.session_state['image_data'])
-            if asset_urn:
-                if post_to_linkedin_api(st.session_state['generated_post'], asset_urn=asset_urn):
-                    st.success("Published Successfully!")
-                    del st.session_state['generated_post']
+            start_job('upload_remix', upload_image_to_linkedin, st.session_state['image_data'], label="Uploading...")
+        
+        asset_urn = take_job('upload_remix')
+        if asset_urn:
+            if post_to_linkedin_api(st.session_state['generated_post'], asset_urn=asset_urn):
+                st.success("Published Successfully!")
+                del st.session_state['generated_post']
 
 elif option == "🧠 Quiz Challenge":
     st.header("Mode 4: Quiz Challenge")
@@ -765,34 +966,33 @@ elif option == "🧠 Quiz Challenge":
     )
     
     if st.button("🎲 Generate Quiz"):
-        with st.spinner(f"Creating {category} quiz..."):
-            quiz_data = generate_quiz_question(category)
-            
-            if quiz_data:
-                quiz_data['category'] = category
-                st.session_state['quiz_data'] = quiz_data
-                
-                # Create quiz image
-                image_bytes, pil_image = create_quiz_image(quiz_data, category)
-                st.session_state['quiz_image'] = pil_image
-                st.session_state['quiz_image_bytes'] = image_bytes
-                
-                # Generate post text
-                post = generate_post_text(None, type="quiz", quiz_data=quiz_data)
-                st.session_state['generated_post'] = post
-                st.session_state['post_type'] = 'quiz'
+        start_job('quiz', build_quiz, category, load_quiz_template(), load_quiz_fonts(),
+                  label=f"Creating {category} quiz...")
+    
+    quiz = take_job('quiz')
+    if quiz:
+        st.session_state['quiz_data'] = quiz['quiz_data']
+        st.session_state['quiz_image'] = quiz['image']
+        st.session_state['quiz_image_bytes'] = quiz['image_bytes']
+        
+        # Generate post text
+        post = generate_post_text(None, type="quiz", quiz_data=quiz['quiz_data'], fresh=not REUSE_AI_RESPONSES, stream=STREAM_AI_OUTPUT, variants=POST_VARIANTS)
+        if post:
+            commit_generated_post(post)
+            st.session_state['post_type'] = 'quiz'
     
     if 'generated_post' in st.session_state and st.session_state.get('post_type') == 'quiz':
         st.session_state['generated_post'] = str(st.session_state['generated_post'])
         show_post_preview(image=st.session_state.get('quiz_image'))
         
         if st.button("🚀 Publish Quiz"):
-            with st.spinner("Publishing..."):
-                asset_urn = upload_image_to_linkedin(st.session_state['quiz_image_bytes'])
-                if asset_urn:
-                    if post_to_linkedin_api(st.session_state['generated_post'], asset_urn=asset_urn):
-                        st.success("Quiz Published Successfully!")
-                        del st.session_state['generated_post']
-                        del st.session_state['quiz_data']
-                    else:
-                        st.error("Post creation failed.")
+            start_job('upload_quiz', upload_image_to_linkedin, st.session_state['quiz_image_bytes'], label="Publishing...")
+        
+        asset_urn = take_job('upload_quiz')
+        if asset_urn:
+            if post_to_linkedin_api(st.session_state['generated_post'], asset_urn=asset_urn):
+                st.success("Quiz Published Successfully!")
+                del st.session_state['generated_post']
+                del st.session_state['quiz_data']
+            else:
+                st.error("Post creation failed.")
@@ -0,0 +1,142 @@
+import os
+import threading
+
+import llm_cache
+from llm_limiter import QuotaExceeded
+from model_registry import DEFAULT_MODEL, get_model, limiter_metrics, use_api_key, warm
+from prompt_templates import render
+from text_budget import count_tokens
+
+# --- GEMINI TEXT CALLS ---
+# Single entry point for Gemini text generation so every call site shares the
+# response cache and the per-key client registry.
+
+# How many variant requests may be waiting on the limiter at once
+VARIANT_CONCURRENCY = int(os.getenv('LLM_VARIANT_CONCURRENCY', '4'))
+# Variants need some randomness, or they all come back the same
+VARIANT_TEMPERATURE = 1.0
+
+# Input token accounting: what was sent, how much of it was the templates'
+# static system instructions, and what the local response cache avoided
+# sending at all.
+_usage_lock = threading.Lock()
+_usage = {'calls': 0, 'input_tokens': 0, 'system_tokens': 0, 'local_hits': 0, 'local_saved_tokens': 0}
+
+
+def generate_text(prompt, model_name=DEFAULT_MODEL, generation_config=None, fresh=False):
+    """
+    Returns the response text for `prompt`.
+    With fresh=True the cache is not consulted (a new variant is generated) but
+    the new answer still replaces the cached one. Errors propagate to the caller.
+    """
+    cache, key, cached = _lookup(prompt, model_name, generation_config, fresh)
+    if cached is not None:
+        return cached
+
+    response = get_model(model_name).generate_content(prompt, config=generation_config)
+    _record_usage(getattr(response, 'usage_metadata', None), generation_config)
+    text = response.text
+    cache.put(key, text)
+    return text
+
+
+def stream_text(prompt, model_name=DEFAULT_MODEL, generation_config=None, fresh=False):
+    """
+    Yields the response text in chunks as Gemini produces them (a cached answer
+    is yielded whole). The full text is cached once the stream completes.
+    """
+    cache, key, cached = _lookup(prompt, model_name, generation_config, fresh)
+    if cached is not None:
+        yield cached
+        return
+
+    parts = []
+    usage = None
+    for chunk in get_model(model_name).generate_content_stream(prompt, config=generation_config):
+        usage = getattr(chunk, 'usage_metadata', None) or usage
+        if chunk.text:
+            parts.append(chunk.text)
+            yield chunk.text
+    _record_usage(usage, generation_config)
+    cache.put(key, ''.join(parts))
+
+
+def generate_variants(prompt, k, model_name=DEFAULT_MODEL, generation_config=None, fresh=False):
+    """
+    Generates `k` alternative answers to `prompt` concurrently and returns the
+    texts that succeeded (in variant order). Each variant has its own cache
+    entry. Raises the first error only if every variant failed.
+    """
+    config = dict(generation_config or {})
+    config.setdefault('temperature', VARIANT_TEMPERATURE)
+    prompts = [prompt] + [
+        f"{prompt}\n\n(Alternative version {i + 1}: use a different hook and angle than the obvious one.)"
+        for i in range(1, k)
+    ]
+    # asyncio is only needed here; importing it at module level slowed every bot's start
+    import asyncio
+    results = asyncio.run(_gather_variants(prompts, model_name, config, fresh))
+    texts = [r for r in results if isinstance(r, str) and r.strip()]
+    if not texts:
+        errors = [r for r in results if isinstance(r, Exception)]
+        if errors:
+            raise errors[0]
+    return texts
+
+
+async def _gather_variants(prompts, model_name, config, fresh):
+    import asyncio
+    semaphore = asyncio.Semaphore(VARIANT_CONCURRENCY)
+
+    async def one(prompt):
+        async with semaphore:
+            # Worker threads inherit the caller's context, so the session's API key and limiter apply
+            return await asyncio.to_thread(generate_text, prompt, model_name, config, fresh)
+
+    return await asyncio.gather(*(one(p) for p in prompts), return_exceptions=True)
+
+
+def generate_from_template(name, model_name=DEFAULT_MODEL, fresh=False, **fields):
+    """generate_text for a registered prompt template: static rules go as the system instruction."""
+    prompt, config = render(name, **fields)
+    return generate_text(prompt, model_name, config, fresh)
+
+
+def _lookup(prompt, model_name, generation_config, fresh):
+    cache = llm_cache.get_cache()
+    key = llm_cache.make_key(model_name, prompt, generation_config)
+    if fresh:
+        cache.stats['bypassed'] += 1
+        return cache, key, None
+    cached = cache.get(key)
+    if cached is not None:
+        system = (generation_config or {}).get('system_instruction') or ''
+        with _usage_lock:
+            _usage['local_hits'] += 1
+            _usage['local_saved_tokens'] += count_tokens(prompt) + count_tokens(system)
+    return cache, key, cached
+
+
+def _record_usage(usage, generation_config):
+    system = (generation_config or {}).get('system_instruction') or ''
+    prompt_tokens = getattr(usage, 'prompt_token_count', None) or 0
+    with _usage_lock:
+        _usage['calls'] += 1
+        _usage['input_tokens'] += prompt_tokens
+        _usage['system_tokens'] += count_tokens(system) if system else 0
+
+
+def usage_report():
+    """
+    Input token totals: tokens sent to Gemini, the share of them that was static
+    template rules (system_pct), and the tokens local cache hits didn't send.
+    """
+    with _usage_lock:
+        report = dict(_usage)
+    report['system_pct'] = round(100 * report['system_tokens'] / report['input_tokens']) if report['input_tokens'] else 0
+    return report
+
+
+def cache_stats():
+    cache = llm_cache.get_cache()
+    return dict(cache.stats, hit_rate=round(cache.hit_rate(), 3))
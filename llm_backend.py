@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+from cache_config import CACHE_DIR
+from text_budget import count_tokens
+
+# --- LLM BACKENDS ---
+# Every Gemini request goes through a backend picked with LLM_BACKEND:
+#   live       real API calls (default)
+#   record     real API calls, each request/response pair appended to disk
+#   replay     answers served from a recording; no network, no API key
+#   synthetic  canned answers with configurable latency and error rate
+# so load tests and CI perf checks can run offline and deterministically.
+
+BACKEND_MODE = os.getenv('LLM_BACKEND', 'live').lower()
+RECORDINGS_PATH = os.getenv('LLM_RECORDINGS', os.path.join(CACHE_DIR, 'llm_recordings.jsonl'))
+SYNTHETIC_LATENCY_MS = float(os.getenv('LLM_SYNTHETIC_LATENCY_MS', '300'))
+SYNTHETIC_ERROR_RATE = float(os.getenv('LLM_SYNTHETIC_ERROR_RATE', '0'))
+SYNTHETIC_SEED = os.getenv('LLM_SYNTHETIC_SEED')
+
+OFFLINE_MODES = {'replay', 'synthetic'}
+# Answers to "JSON array of strings" prompts (the trending topic pool)
+SYNTHETIC_TOPICS = ('Generative AI', 'AI chips', 'Humanoid robots', 'Quantum computing', 'AI regulation',
+                    'Open source LLMs', 'AI in banking', 'Crypto regulation', 'AI agents', 'Cloud outages')
+
+
+class ReplayMiss(KeyError):
+    """The recording has no answer for this request."""
+
+
+class SyntheticError(Exception):
+    """Injected failure; `code` makes the rate limiter treat it like a real API error."""
+
+    def __init__(self, code):
+        super().__init__(f"{code} synthetic failure (retry in 1s)")
+        self.code = code
+
+
+def _part_key(part):
+    if isinstance(part, str):
+        return part
+    if isinstance(part, (list, tuple)):
+        return [_part_key(p) for p in part]
+    if hasattr(part, 'tobytes'):
+        # PIL images: identify by pixels, not by object identity
+        return 'image:' + hashlib.sha256(part.tobytes()).hexdigest()
+    return repr(part)
+
+
+def request_key(model_name, contents, config=None):
+    payload = json.dumps({'model': model_name, 'contents': _part_key(contents), 'config': config or {}},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def stored_response(text, prompt_tokens=0, cached_tokens=0):
+    """Minimal stand-in for a GenerateContentResponse (text, usage_metadata, parts)."""
+    usage = SimpleNamespace(prompt_token_count=prompt_tokens, cached_content_token_count=cached_tokens,
+                            total_token_count=prompt_tokens + count_tokens(text or ''))
+    return SimpleNamespace(text=text, usage_metadata=usage, parts=[])
+
+
+def _chunks(response, size=40):
+    text = response.text or ''
+    pieces = [text[i:i + size] for i in range(0, len(text), size)] or ['']
+    for i, piece in enumerate(pieces):
+        # Usage arrives with the last chunk, as with the real stream
+        yield SimpleNamespace(text=piece, usage_metadata=response.usage_metadata if i == len(pieces) - 1 else None)
+
+
+class LiveBackend:
+    def __init__(self, api_key):
+        from google import genai
+        self.client = genai.Client(api_key=api_key)
+
+    def generate(self, model_name, contents, config=None):
+        return self.client.models.generate_content(model=model_name, contents=contents, config=config)
+
+    def stream(self, model_name, contents, config=None):
+        return self.client.models.generate_content_stream(model=model_name, contents=contents, config=config)
+
+
+class RecordBackend(LiveBackend):
+    def __init__(self, api_key, path=RECORDINGS_PATH):
+        super().__init__(api_key)
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _save(self, model_name, contents, config, text, usage):
+        record = {
+            'key': request_key(model_name, contents, config), 'model': model_name, 'text': text,
+            'prompt_tokens': getattr(usage, 'prompt_token_count', None) or 0,
+            'cached_tokens': getattr(usage, 'cached_content_token_count', None) or 0,
+        }
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def generate(self, model_name, contents, config=None):
+        response = super().generate(model_name, contents, config)
+        self._save(model_name, contents, config, response.text, getattr(response, 'usage_metadata', None))
+        return response
+
+    def stream(self, model_name, contents, config=None):
+        parts, usage = [], None
+        for chunk in super().stream(model_name, contents, config):
+            usage = getattr(chunk, 'usage_metadata', None) or usage
+            if chunk.text:
+                parts.append(chunk.text)
+            yield chunk
+        self._save(model_name, contents, config, ''.join(parts), usage)
+
+
+class ReplayBackend:
+    def __init__(self, path=RECORDINGS_PATH):
+        self.path = path
+        self._answers = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        self._answers[record['key']] = record  # latest recording wins
+
+    def generate(self, model_name, contents, config=None):
+        record = self._answers.get(request_key(model_name, contents, config))
+        if record is None:
+            raise ReplayMiss(f"No recorded answer for this {model_name} request in {self.path}")
+        return stored_response(record['text'], record['prompt_tokens'], record['cached_tokens'])
+
+    def stream(self, model_name, contents, config=None):
+        return _chunks(self.generate(model_name, contents, config))
+
+
+def _synthetic_topics(count):
+    """`count` distinct canned topics; names repeat with a number once the list runs out."""
+    n = len(SYNTHETIC_TOPICS)
+    return [SYNTHETIC_TOPICS[i % n] + (f" {i // n + 1}" if i >= n else '') for i in range(count)]
+
+
+class SyntheticBackend:
+    def __init__(self, latency_ms=SYNTHETIC_LATENCY_MS, error_rate=SYNTHETIC_ERROR_RATE, seed=SYNTHETIC_SEED):
+        self.latency_s = latency_ms / 1000.0
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _answer(self, model_name, contents, config):
+        prompt = '\n'.join(p for p in contents if isinstance(p, str)) if isinstance(contents, (list, tuple)) else str(contents)
+        if (config or {}).get('response_mime_type') == 'application/json':
+            if re.search(r'JSON (array|list) of strings', prompt, re.I):
+                # "List the N ..." sets the length
+                wanted = re.search(r'\bList the (\d+)\b', prompt)
+                return json.dumps(_synthetic_topics(int(wanted.group(1)) if wanted else 5))
+            # Batch scoring prompts list candidates as "[i] Title: ..."
+            ids = sorted({int(i) for i in re.findall(r'^\s*\[(\d+)\] Title:', prompt, re.M)})
+            return json.dumps([{'id': i, 'score': 7, 'reason': 'synthetic'} for i in ids])
+        digest = request_key(model_name, contents, config)[:8]
+        return f"Synthetic {model_name} answer {digest}.\n\nThis stands in for a real post during offline runs.\n\n#AI #Tech"
+
+    def generate(self, model_name, contents, config=None):
+        with self._lock:
+            delay = self.latency_s * self._random.uniform(0.8, 1.2)
+            fail = self._random.random() < self.error_rate
+        time.sleep(delay)
+        if fail:
+            raise SyntheticError(429)
+        text = self._answer(model_name, contents, config)
+        key = _part_key(contents)
+        # Like Gemini's prompt_token_count, this includes the system instruction
+        system = (config or {}).get('system_instruction') or ''
+        return stored_response(text, count_tokens(key if isinstance(key, str) else json.dumps(key)) + count_tokens(system))
+
+    def stream(self, model_name, contents, config=None):
+        return _chunks(self.generate(model_name, contents, config))
+
+
+def create_backend(api_key=None, mode=None):
+    mode = mode or BACKEND_MODE
+    if mode == 'live':
+        return LiveBackend(api_key)
+    if mode == 'record':
+        return RecordBackend(api_key)
+    if mode == 'replay':
+        return ReplayBackend()
+    if mode == 'synthetic':
+        return SyntheticBackend()
+    raise ValueError(f"Unknown LLM_BACKEND '{mode}' (expected live, record, replay or synthetic)")
@@ -0,0 +1,88 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from cache_config import cache_path
+
+# --- LLM RESPONSE CACHE ---
+# Gemini responses are stored on disk keyed by model, normalized prompt and
+# generation parameters, with a TTL and a cap on the number of entries, so
+# Streamlit reruns and retries after a failed publish don't pay for the same
+# post twice.
+
+LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '5000'))
+
+
+def normalize_prompt(prompt):
+    """Indentation and blank lines from f-string prompts should not change the key."""
+    lines = (line.strip() for line in prompt.strip().splitlines())
+    return '\n'.join(line for line in lines if line)
+
+
+def make_key(model_name, prompt, generation_config=None):
+    payload = json.dumps({
+        'model': model_name,
+        'prompt': hashlib.sha256(normalize_prompt(prompt).encode('utf-8')).hexdigest(),
+        'config': generation_config or {},
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LlmCache:
+    def __init__(self, db_path, ttl=LLM_CACHE_TTL, max_entries=LLM_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stats = {'hits': 0, 'misses': 0, 'bypassed': 0}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, text TEXT, created_at REAL, last_access REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)")
+        self._conn.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT text, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row and row[1] + self.ttl > now:
+                self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+                self.stats['hits'] += 1
+                return row[0]
+            self.stats['misses'] += 1
+            return None
+
+    def put(self, key, text):
+        now = time.time()
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)", (key, text, now, now))
+            # Expired rows first, then least recently used beyond the cap.
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def hit_rate(self):
+        lookups = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits'] / lookups if lookups else 0.0
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LlmCache(cache_path('llm_cache.db'))
+    return _cache
@@ -0,0 +1,166 @@
+import os
+import random
+import re
+import threading
+import time
+
+from text_budget import count_tokens
+
+# --- GEMINI RATE LIMITER ---
+# The app sessions and the bots share one API key. Every Gemini request waits
+# here for a requests-per-minute and a tokens-per-minute budget. A 429/5xx is
+# retried with jittered exponential backoff that never retries sooner than the
+# server's retry hint, and the wait blocks every caller on that key, not only
+# the one that got throttled.
+
+GEMINI_RPM = float(os.getenv('GEMINI_RPM', '10'))
+GEMINI_TPM = float(os.getenv('GEMINI_TPM', '250000'))
+GEMINI_MAX_RETRIES = int(os.getenv('GEMINI_MAX_RETRIES', '4'))
+BACKOFF_BASE = float(os.getenv('GEMINI_BACKOFF_BASE', '2'))
+MAX_BACKOFF = float(os.getenv('GEMINI_MAX_BACKOFF', '60'))
+
+RETRYABLE_STATUS = {429, 500, 503}
+# Tokens assumed for the answer until the response reports real usage
+OUTPUT_TOKEN_ESTIMATE = 800
+# Gemini bills an image input as a fixed number of tokens
+IMAGE_TOKENS = 258
+
+
+class QuotaExceeded(Exception):
+    """Raised when Gemini keeps answering 429 after all retries."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def estimate_tokens(contents):
+    """Cheap local estimate of a request's input size."""
+    if isinstance(contents, str):
+        return count_tokens(contents) + 1
+    if isinstance(contents, (list, tuple)):
+        return sum(estimate_tokens(c) for c in contents)
+    return IMAGE_TOKENS
+
+
+def error_status(error):
+    code = getattr(error, 'code', None)
+    if isinstance(code, int):
+        return code
+    text = str(error)
+    if '429' in text or 'RESOURCE_EXHAUSTED' in text or 'ResourceExhausted' in text:
+        return 429
+    if '503' in text or 'UNAVAILABLE' in text:
+        return 503
+    return None
+
+
+def retry_hint(error):
+    """Seconds the server asked us to wait (RetryInfo.retryDelay or 'retry in Ns'), or None."""
+    details = getattr(error, 'details', None)
+    if isinstance(details, dict):
+        for item in details.get('error', {}).get('details', []):
+            delay = item.get('retryDelay') if isinstance(item, dict) else None
+            if delay:
+                try:
+                    return float(delay.rstrip('s'))
+                except ValueError:
+                    pass
+    match = re.search(r"retry in ([\d.]+)\s*s|retryDelay'?\"?:\s*'?\"?([\d.]+)s", str(error), re.I)
+    if match:
+        return float(match.group(1) or match.group(2))
+    return None
+
+
+def backoff_delay(attempt, hint=None):
+    """Exponential backoff with jitter, never shorter than the server's hint."""
+    delay = min(MAX_BACKOFF, BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.0)
+    return max(delay, hint or 0.0)
+
+
+class _Bucket:
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_for(self, amount):
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+
+class GeminiLimiter:
+    def __init__(self, rpm=GEMINI_RPM, tpm=GEMINI_TPM):
+        self._lock = threading.Lock()
+        self._requests = _Bucket(rpm)
+        self._tokens = _Bucket(tpm)
+        self.blocked_until = 0.0
+        self.stats = {'calls': 0, 'retries': 0, 'throttled': 0, 'queued_s': 0.0, 'tokens': 0}
+
+    def acquire(self, tokens):
+        """Blocks until one request and `tokens` tokens fit in the budgets; returns seconds waited."""
+        tokens = min(tokens, self._tokens.capacity)
+        started = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._requests.refill(now)
+                self._tokens.refill(now)
+                wait = max(self.blocked_until - now, self._requests.wait_for(1), self._tokens.wait_for(tokens))
+                if wait <= 0:
+                    self._requests.tokens -= 1
+                    self._tokens.tokens -= tokens
+                    waited = now - started
+                    self.stats['queued_s'] += waited
+                    return waited
+            time.sleep(wait)
+
+    def settle(self, estimated, used):
+        """Corrects the token budget once the response reports its real usage."""
+        with self._lock:
+            self._tokens.tokens -= used - estimated
+            self.stats['tokens'] += used
+
+    def call(self, send, contents):
+        """Runs `send()` (one Gemini request for `contents`) inside the budgets, retrying 429/5xx."""
+        estimated = estimate_tokens(contents) + OUTPUT_TOKEN_ESTIMATE
+        for attempt in range(GEMINI_MAX_RETRIES + 1):
+            self.acquire(estimated)
+            with self._lock:
+                self.stats['calls'] += 1
+            try:
+                response = send()
+            except Exception as e:
+                status = error_status(e)
+                if status not in RETRYABLE_STATUS:
+                    raise
+                hint = retry_hint(e)
+                delay = backoff_delay(attempt, hint)
+                with self._lock:
+                    if status == 429:
+                        self.stats['throttled'] += 1
+                        # Everyone on this key waits, not just this caller
+                        self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+                if attempt == GEMINI_MAX_RETRIES:
+                    if status == 429:
+                        raise QuotaExceeded(f"Gemini quota exhausted, retry in {delay:.0f}s", retry_after=delay) from e
+                    raise
+                with self._lock:
+                    self.stats['retries'] += 1
+                print(f"Gemini returned {status}, retrying in {delay:.1f}s...")
+                if status != 429:
+                    time.sleep(delay)
+                continue
+
+            usage = getattr(response, 'usage_metadata', None)
+            used = getattr(usage, 'total_token_count', None)
+            self.settle(estimated, used if isinstance(used, int) else estimated)
+            return response
+
+    def metrics(self):
+        with self._lock:
+            return dict(self.stats, queued_s=round(self.stats['queued_s'], 3))
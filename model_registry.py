@@ -0,0 +1,125 @@
+import contextvars
+import itertools
+import os
+import threading
+
+import llm_backend
+from llm_limiter import GeminiLimiter
+
+# --- GEMINI CLIENT REGISTRY ---
+# Clients are built once per API key and model handles once per (key, model)
+# and reused by every thread and session. google.genai clients carry their own
+# key, so nothing global is configured and sessions with different keys don't
+# share state. Each key also gets one rate limiter that every request on it
+# goes through. Requests are sent through the backend chosen with LLM_BACKEND
+# (live, record, replay or synthetic); the offline ones need no API key and
+# share one backend.
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+
+# API key of the current Streamlit session / script; falls back to the environment.
+_current_api_key = contextvars.ContextVar('gemini_api_key', default=None)
+
+
+def use_api_key(api_key):
+    """Sets the key used by calls on this thread/context (each Streamlit session has its own)."""
+    _current_api_key.set(api_key or None)
+
+
+def current_api_key():
+    return _current_api_key.get() or os.getenv('GEMINI_API_KEY')
+
+
+class BoundModel:
+    """A model name bound to a backend and its key's limiter, so call sites don't repeat any of them."""
+
+    def __init__(self, backend, model_name, limiter):
+        self.backend = backend
+        self.model_name = model_name
+        self.limiter = limiter
+
+    def generate_content(self, contents, config=None):
+        return self.limiter.call(lambda: self.backend.generate(self.model_name, contents, config), contents)
+
+    def generate_content_stream(self, contents, config=None):
+        def start():
+            # The request is only sent when the first chunk is read, so read it
+            # here where a 429 can still be retried by the limiter.
+            stream = iter(self.backend.stream(self.model_name, contents, config))
+            first = next(stream, None)
+            return itertools.chain([first] if first is not None else [], stream)
+
+        return self.limiter.call(start, contents)
+
+
+class ModelRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._backends = {}
+        self._models = {}
+        self._limiters = {}
+
+    def _backend_key(self, api_key):
+        if llm_backend.BACKEND_MODE in llm_backend.OFFLINE_MODES:
+            return llm_backend.BACKEND_MODE
+        api_key = api_key or current_api_key()
+        if not api_key:
+            raise ValueError("Gemini API key is missing")
+        return api_key
+
+    def backend(self, api_key=None):
+        key = self._backend_key(api_key)
+        backend = self._backends.get(key)
+        if backend is None:
+            with self._lock:
+                backend = self._backends.get(key)
+                if backend is None:
+                    backend = llm_backend.create_backend(api_key=key)
+                    self._backends[key] = backend
+                    self._limiters[key] = GeminiLimiter()
+        return backend
+
+    def model(self, model_name=DEFAULT_MODEL, api_key=None):
+        key = (self._backend_key(api_key), model_name)
+        model = self._models.get(key)
+        if model is None:
+            backend = self.backend(api_key)
+            with self._lock:
+                model = self._models.get(key)
+                if model is None:
+                    model = BoundModel(backend, model_name, self._limiters[key[0]])
+                    self._models[key] = model
+        return model
+
+    def limiter_metrics(self):
+        """Limiter stats summed over every API key."""
+        with self._lock:
+            limiters = list(self._limiters.values())
+        totals = {'calls': 0, 'retries': 0, 'throttled': 0, 'queued_s': 0.0, 'tokens': 0}
+        for limiter in limiters:
+            for name, value in limiter.metrics().items():
+                totals[name] += value
+        totals['queued_s'] = round(totals['queued_s'], 3)
+        return totals
+
+    def warm(self, api_key=None, model_names=(DEFAULT_MODEL,)):
+        """Builds the client and model handles up front (e.g. at startup) so the first request doesn't pay for it."""
+        if not (api_key or current_api_key()) and llm_backend.BACKEND_MODE not in llm_backend.OFFLINE_MODES:
+            return
+        for model_name in model_names:
+            self.model(model_name, api_key)
+
+
+registry = ModelRegistry()
+
+
+def get_model(model_name=DEFAULT_MODEL, api_key=None):
+    return registry.model(model_name, api_key)
+
+
+def warm(api_key=None, model_names=(DEFAULT_MODEL,)):
+    registry.warm(api_key, model_names)
+
+
+def limiter_metrics():
+    return registry.limiter_metrics()
@@ -0,0 +1,67 @@
+import xml.etree.ElementTree as ET
+from email.utils import parsedate_to_datetime
+from urllib.parse import quote_plus
+
+import http_client
+
+# --- GOOGLE NEWS RSS DISCOVERY ---
+# The RSS feed for a Google News query carries title, source, publish time and
+# link per item, which is all discovery needs from the much larger HTML search
+# page. Feeds go through the disk HTTP cache, so repeated searches within the
+# TTL cost no request.
+
+
+def rss_search_url(query):
+    # Callers historically pass 'AI+OR+machine+learning' style queries.
+    return f"https://news.google.com/rss/search?q={quote_plus(query.replace('+', ' '))}&hl=en-US&gl=US&ceid=US:en"
+
+
+def _parse_item(item):
+    source = item.find('source')
+    published = None
+    pub_date = item.findtext('pubDate')
+    if pub_date:
+        try:
+            published = parsedate_to_datetime(pub_date)
+        except (TypeError, ValueError):
+            pass
+    return {
+        'title': (item.findtext('title') or '').strip(),
+        'source': source.text.strip() if source is not None and source.text else '',
+        'source_url': source.get('url', '') if source is not None else '',
+        'published': published,
+        'url': (item.findtext('link') or '').strip(),
+    }
+
+
+def search_news(query, limit=None, timeout=10):
+    """
+    Returns candidate articles for `query` from the Google News RSS feed, in feed
+    order, as dicts with title, source, source_url, published and url.
+    Returns an empty list when the feed can't be fetched or parsed.
+    """
+    candidates = []
+    try:
+        # Served from the disk cache (15 min 'search' TTL, then revalidated)
+        response = http_client.get_cached(rss_search_url(query), timeout=timeout)
+        if response.status_code != 200:
+            print(f"RSS search failed: HTTP {response.status_code}")
+            return candidates
+
+        # Parsed in chunks so a small `limit` stops before the whole feed is built
+        parser = ET.XMLPullParser(events=('end',))
+        content = response.content
+        for start in range(0, len(content), 16384):
+            parser.feed(content[start:start + 16384])
+            for _, elem in parser.read_events():
+                if elem.tag != 'item':
+                    continue
+                candidate = _parse_item(elem)
+                elem.clear()
+                if candidate['url']:
+                    candidates.append(candidate)
+                if limit and len(candidates) >= limit:
+                    return candidates
+    except Exception as e:
+        print(f"RSS search error: {e}")
+    return candidates
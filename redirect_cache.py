@@ -0,0 +1,94 @@
+import re
+import sqlite3
+import threading
+import time
+
+import http_client
+from cache_config import cache_path
+
+# --- GOOGLE NEWS REDIRECT CACHE ---
+# news.google.com/articles/<id> links are resolved to the publisher URL with
+# HEAD (or a GET that never reads the body) and remembered per article ID
+# across runs, so processed or excluded articles can be skipped before any
+# article bytes move.
+
+
+_ARTICLE_ID_RE = re.compile(r'news\.google\.com/(?:rss/)?(?:articles|read)/([A-Za-z0-9_-]+)')
+
+
+def article_id(url):
+    """Returns the Google News article ID in `url`, or None for other URLs."""
+    match = _ARTICLE_ID_RE.search(url)
+    return match.group(1) if match else None
+
+
+class RedirectCache:
+    def __init__(self, db_path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS redirects (article_id TEXT PRIMARY KEY, final_url TEXT, resolved_at REAL)"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT final_url FROM redirects WHERE article_id = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, key, final_url):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO redirects VALUES (?, ?, ?)", (key, final_url, time.time())
+            )
+            self._conn.commit()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = RedirectCache(cache_path('redirects.db'))
+    return _cache
+
+
+def _follow(url, timeout):
+    try:
+        res = http_client.head(url, allow_redirects=True, timeout=timeout)
+        if res.status_code < 400:
+            return res.url
+    except Exception:
+        pass
+    # Some servers reject HEAD; stream=True stops requests from reading the body.
+    res = http_client.get(url, allow_redirects=True, stream=True, timeout=timeout)
+    res.close()
+    return res.url
+
+
+def resolve(url, timeout=10):
+    """Returns the publisher URL a Google News link redirects to, from cache when known."""
+    key = article_id(url)
+    if key is None:
+        return url
+
+    cache = get_cache()
+    final_url = cache.get(key)
+    if final_url:
+        return final_url
+
+    try:
+        final_url = _follow(url, timeout)
+    except Exception as e:
+        print(f"Redirect resolution failed for {url}: {e}")
+        return url
+    # Only remember real publisher URLs; a link that stays on news.google.com
+    # was not resolved and should be retried next run.
+    if 'news.google.com' not in final_url:
+        cache.put(key, final_url)
+    return final_url
@@ -0,0 +1,110 @@
+import math
+import re
+from collections import Counter
+
+# --- TOKEN BUDGETS FOR PROMPT CONTENT ---
+# fit_to_budget counts tokens locally, keeps whole sentences up to a per-prompt
+# token budget and can first drop redundant sentences with a cheap extractive
+# summary.
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?…])["\')\]]*\s+(?=["\'(\[]?[A-Z0-9])|\n+')
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+STOPWORDS = frozenset("""
+a an and are as at be been but by can could did do does for from had has have he her his how i if in into
+is it its just more most new not of on or our she so than that the their them then there these they this
+to was we were what when which who will with would you your said says also about after over up out one
+""".split())
+
+# Sentences sharing this much vocabulary with an earlier one are treated as repeats
+REDUNDANCY_THRESHOLD = 0.6
+
+
+def count_tokens(text):
+    """
+    Local token estimate (no API call). Words are split into ~4-character
+    pieces and punctuation counts as its own token, which tracks Gemini's
+    SentencePiece counts on English prose closely enough for budgeting.
+    """
+    return sum(math.ceil(len(t) / 4) if t[0].isalnum() or t[0] == '_' else 1 for t in _TOKEN_RE.findall(text))
+
+
+def split_sentences(text):
+    return [s.strip() for s in _SENTENCE_END_RE.split(text) if s and s.strip()]
+
+
+def _words(sentence):
+    return {w for w in _WORD_RE.findall(sentence.lower()) if w not in STOPWORDS}
+
+
+def compact(sentences):
+    """Drops sentences that mostly repeat an earlier one (Jaccard overlap of content words)."""
+    kept, seen = [], []
+    for sentence in sentences:
+        words = _words(sentence)
+        if words and any(len(words & other) / len(words | other) >= REDUNDANCY_THRESHOLD for other in seen):
+            continue
+        kept.append(sentence)
+        seen.append(words)
+    return kept
+
+
+def _rank(sentences):
+    """Extractive scoring: content-word frequency across the text plus a bonus for the lead."""
+    freq = Counter(w for s in sentences for w in _words(s))
+    scores = []
+    for i, sentence in enumerate(sentences):
+        words = _words(sentence)
+        score = sum(freq[w] for w in words) / (len(words) + 1) if words else 0.0
+        scores.append(score * (1.5 if i < 2 else 1.0))
+    return scores
+
+
+def _cut_words(text, max_tokens):
+    out, used = [], 0
+    for word in text.split():
+        cost = count_tokens(word)
+        if used + cost > max_tokens:
+            break
+        out.append(word)
+        used += cost
+    if not out:
+        # One unbroken run of characters (URL, hash, ...): ~4 characters per token
+        return text[:max_tokens * 4] + '…'
+    return ' '.join(out) + '…'
+
+
+def fit_to_budget(text, max_tokens, summarize=False):
+    """
+    Returns `text` trimmed to at most `max_tokens` (estimated) at sentence
+    boundaries. With summarize=True redundant sentences are dropped first and,
+    if the text is still too long, the highest-scoring sentences are kept in
+    their original order instead of just the leading ones.
+    """
+    text = text or ''
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    sentences = split_sentences(text)
+    if summarize:
+        sentences = compact(sentences)
+        scores = _rank(sentences)
+        order = sorted(range(len(sentences)), key=lambda i: -scores[i])
+    else:
+        order = range(len(sentences))
+
+    chosen, used = set(), 0
+    for i in order:
+        cost = count_tokens(sentences[i])
+        if used + cost > max_tokens:
+            if summarize:
+                continue
+            break
+        chosen.add(i)
+        used += cost
+
+    if not chosen:
+        # A single sentence longer than the whole budget: cut it at a word boundary
+        return _cut_words(sentences[0] if sentences else text, max_tokens)
+    return ' '.join(sentences[i] for i in sorted(chosen))
@@ -0,0 +1,171 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import llm
+from cache_config import cache_path
+
+# --- TRENDING TOPIC SERVICE ---
+# The service asks Gemini once per time window for a ranked pool of topics,
+# keeps it on disk and hands the topics out in rotation, skipping recently
+# covered ones, so later picks need no LLM call.
+
+TOPIC_POOL_SIZE = int(os.getenv('TOPIC_POOL_SIZE', '20'))
+TOPIC_POOL_TTL = int(os.getenv('TOPIC_POOL_TTL', str(6 * 3600)))
+# Seconds to hand out the fallback topic after a refresh gave nothing usable
+TOPIC_POOL_RETRY = int(os.getenv('TOPIC_POOL_RETRY', '600'))
+FALLBACK_TOPIC = "Artificial Intelligence"
+
+
+class TopicManager:
+    def __init__(self, history_file='topic_history.json'):
+        self.history_file = history_file
+        self.history = self._load_history()
+
+    def _load_history(self):
+        try:
+            with open(self.history_file, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+
+    def get_banned_topics(self, days=5):
+        """Returns topics used in the last N days."""
+        cutoff = datetime.now() - timedelta(days=days)
+        banned = []
+        for entry in self.history:
+            try:
+                entry_date = datetime.strptime(entry['date'], "%Y-%m-%d")
+                if entry_date > cutoff:
+                    banned.append(entry['topic'])
+            except ValueError:
+                continue # Skip malformed dates
+        return banned
+
+    def log_topic(self, topic):
+        """Logs a new topic usage."""
+        print(f"Logging topic usage: {topic}")
+        self.history.append({
+            'date': datetime.now().strftime("%Y-%m-%d"),
+            'topic': topic
+        })
+        # Keep history clean, limit to last 50 entries
+        if len(self.history) > 50:
+            self.history = self.history[-50:]
+
+        try:
+            with open(self.history_file, 'w') as f:
+                json.dump(self.history, f, indent=2)
+        except Exception as e:
+            print(f"Error saving topic history: {e}")
+
+
+def _pool_prompt(size, avoid_topics):
+    avoid_str = ", ".join(avoid_topics) if avoid_topics else "None"
+    return f"""
+    List the {size} most trending search terms/topics in the Technology sector for today ({datetime.now().strftime('%Y-%m-%d')}), most trending first.
+
+    Scope:
+    - AI & Tech (Generative AI, Robotics, Hardware, Software)
+    - Tech x Finance (FinTech, Crypto regulations, AI in banking)
+    - Tech x Marketing (AdTech, Social Media algorithms, AI content)
+
+    Context:
+    - These are Google News search terms for a LinkedIn bot that finds news articles.
+    - Each topic must be popular enough to have news written about it TODAY.
+
+    Constraints:
+    - Each topic is a specific search term under 5 words. No quotes, no explanations.
+    - Do NOT include any of these previously covered topics: {avoid_str}
+
+    Reply ONLY with a JSON array of strings.
+    """
+
+
+class TopicService:
+    def __init__(self, pool_path, size=TOPIC_POOL_SIZE, ttl=TOPIC_POOL_TTL):
+        self.pool_path = pool_path
+        self.size = size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._retry_at = 0.0
+
+    def _load(self):
+        try:
+            with open(self.pool_path, 'r', encoding='utf-8') as f:
+                pool = json.load(f)
+            if pool['created_at'] + self.ttl > time.time():
+                return pool
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            pass
+        return None
+
+    def _save(self, pool):
+        tmp = self.pool_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(pool, f, indent=2)
+        os.replace(tmp, self.pool_path)
+
+    def _refresh(self, banned):
+        """One Gemini call for a whole ranked pool."""
+        print("Consulting AI for a pool of trending topics...")
+        raw = llm.generate_text(_pool_prompt(self.size, banned),
+                                generation_config={"response_mime_type": "application/json"}, fresh=True)
+        topics = []
+        for topic in json.loads(raw):
+            topic = str(topic).strip().replace('"', '').replace("'", "")
+            if topic and topic.lower() not in {t.lower() for t in topics}:
+                topics.append(topic)
+        if not topics:
+            # Saving an empty pool would make every later pick refresh again
+            raise ValueError("Gemini returned no topics")
+        pool = {'created_at': time.time(), 'topics': topics[:self.size], 'cursor': 0}
+        self._save(pool)
+        return pool
+
+    def next_topic(self, banned=()):
+        """Hands out the next pool topic not in `banned`; refreshes the pool when it is stale or used up."""
+        banned_lower = {b.lower() for b in banned}
+        with self._lock:
+            pool = self._load()
+            for attempt in range(2):
+                if pool is None:
+                    if time.time() < self._retry_at:
+                        return FALLBACK_TOPIC
+                    try:
+                        pool = self._refresh(list(banned))
+                    except Exception as e:
+                        print(f"Topic pool error: {e}")
+                        self._retry_at = time.time() + TOPIC_POOL_RETRY
+                        return FALLBACK_TOPIC
+                topics = pool['topics']
+                while pool['cursor'] < len(topics):
+                    topic = topics[pool['cursor']]
+                    pool['cursor'] += 1
+                    if topic.lower() not in banned_lower:
+                        self._save(pool)
+                        return topic
+                # Every topic handed out or banned: ask for a new pool once
+                pool = None
+            # Even a fresh pool had nothing usable: don't ask again on every pick
+            self._retry_at = time.time() + TOPIC_POOL_RETRY
+            return FALLBACK_TOPIC
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_service():
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = TopicService(cache_path('topic_pool.json'))
+    return _service
+
+
+def next_topic(banned=()):
+    return get_service().next_topic(banned)
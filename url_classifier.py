@@ -0,0 +1,127 @@
+import re
+from urllib.parse import urlparse
+
+# --- URL CLASSIFIER ---
+# The exclude patterns and tech keywords are compiled once into trie-shaped
+# regexes, and every discovered URL is labelled in a single pass that both the
+# keyword selection and the "Panic Mode" fallback read from.
+
+EXCLUDE_PATTERNS = [
+    'gstatic.com', 'googleusercontent.com', 'google.com/search', 'google.com/url',
+    'accounts.google.com', 'play.google.com', 'blogger.googleusercontent.com',
+    'cdn-apple.com', 'cloudfront.net', 'springernature.com', 'b-cdn.net',
+    'transforms.svdcdn.com', 'contentstack.com', '.jpg', '.jpeg', '.png', '.gif',
+    '.webp', '.ico', 'favicon', 'image', '/img/', '/images/', 'media.',
+    'thumbnail', 'storage.googleapis.com', 'lh3.googleusercontent.com',
+    'accounts.', 'login.', 'auth.', 'amp/', '.amp', 'rss/', 'feed/',
+    'signup', 'subscribe', 'advertisement', 'analytics'
+]
+
+TECH_KEYWORDS = ['ai', 'artificial-intelligence', 'machine-learning', 'tech', 'finance', 'crypto', 'robotics']
+
+# Labels returned by UrlClassifier.classify
+EXCLUDED = 'excluded'
+KEYWORD = 'keyword'
+ARTICLE = 'article'
+OTHER = 'other'
+
+_ARTICLE_RE = re.compile(r'/read/|articles')
+
+
+def _substring_regex(patterns):
+    """
+    Compiles patterns into one regex that finds any of them as a substring.
+    Patterns containing a shorter pattern can never change the answer and are
+    dropped; the rest are merged into a character trie so the engine walks
+    shared prefixes once instead of trying every alternative at each position.
+    """
+    kept = []
+    for pattern in sorted(set(patterns), key=len):
+        if not any(shorter in pattern for shorter in kept):
+            kept.append(pattern)
+
+    trie = {}
+    for pattern in kept:
+        node = trie
+        for char in pattern:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return re.compile(build(trie))
+
+
+def canonical_url(url):
+    """The form URLs are stored in processed_urls: no query, fragment or trailing slash."""
+    return url.split('?')[0].split('#')[0].rstrip('/')
+
+
+class UrlClassifier:
+    """
+    Labels URLs as excluded, keyword match, generic article or other.
+
+    `exclude_patterns` and `keywords` keep the old substring semantics.
+    `excluded_domains` are matched on the host and its parent domains through a
+    set lookup, so 'nyt.com' blocks www.nyt.com but not a path mentioning it.
+    """
+
+    def __init__(self, exclude_patterns=EXCLUDE_PATTERNS, keywords=TECH_KEYWORDS, excluded_domains=()):
+        self._exclude_re = _substring_regex(exclude_patterns) if exclude_patterns else None
+        self._keyword_re = _substring_regex(keywords) if keywords else None
+        self._excluded_domains = frozenset(d.lower() for d in excluded_domains)
+
+    def is_excluded_domain(self, url):
+        if not self._excluded_domains:
+            return False
+        host = urlparse(url).hostname or ''
+        labels = host.split('.')
+        return any('.'.join(labels[i:]) in self._excluded_domains for i in range(len(labels) - 1))
+
+    def label(self, url):
+        lowered = url.lower()
+        if self._exclude_re is not None and self._exclude_re.search(lowered):
+            return EXCLUDED
+        if self.is_excluded_domain(url):
+            return EXCLUDED
+        if self._keyword_re is not None and self._keyword_re.search(lowered):
+            return KEYWORD
+        if _ARTICLE_RE.search(lowered):
+            return ARTICLE
+        return OTHER
+
+    def classify(self, url):
+        """Returns (label, canonical_url)."""
+        return self.label(url), canonical_url(url)
+
+    def select(self, urls, processed=(), fallback=True):
+        """
+        Single pass over `urls`: returns keyword matches that are new (not in
+        `processed`, first occurrence only), or, when there are none and
+        `fallback` is set, the new generic article links ("Panic Mode").
+        """
+        matches, articles = [], []
+        seen = set()
+        for url in urls:
+            label = self.label(url)
+            if label == EXCLUDED or label == OTHER:
+                continue
+            canonical = canonical_url(url)
+            if canonical in seen:
+                continue
+            seen.add(canonical)
+            if canonical in processed:
+                continue
+            if label == KEYWORD:
+                matches.append(url)
+            elif fallback:
+                articles.append(url)
+        return matches or articles
+
+
+default_classifier = UrlClassifier()
@@ -0,0 +1,76 @@
+import csv
+import os
+import sqlite3
+import threading
+
+# --- PROCESSED URL STORE ---
+# The processed-URL history is kept in an indexed SQLite file next to
+# processed_urls.csv, so membership checks and appends don't depend on how many
+# URLs have been posted.
+
+DEFAULT_SHEET_PATH = 'processed_urls.csv'
+
+
+class ProcessedUrlStore:
+    def __init__(self, db_path, legacy_csv=None):
+        self.db_path = db_path
+        self.legacy_csv = legacy_csv
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY) WITHOUT ROWID")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.commit()
+        if legacy_csv:
+            self._migrate_from_csv(legacy_csv)
+
+    def _migrate_from_csv(self, csv_path):
+        """One-time import of the old CSV history (header 'url', one URL per row)."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'migrated_csv'").fetchone()
+            if row or not os.path.exists(csv_path):
+                return
+            try:
+                with open(csv_path, newline='', encoding='utf-8') as f:
+                    reader = csv.reader(f)
+                    urls = ((r[0].strip(),) for r in reader if r and r[0].strip() and r[0].strip() != 'url')
+                    self._conn.executemany("INSERT OR IGNORE INTO urls (url) VALUES (?)", urls)
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_csv', ?)", (csv_path,))
+                self._conn.commit()
+                print(f"Migrated processed URL history from {csv_path} to {self.db_path}")
+            except Exception as e:
+                self._conn.rollback()
+                print(f"Error migrating URL history: {e}")
+
+    def __contains__(self, url):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM urls WHERE url = ?", (url,)).fetchone() is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+
+    def add(self, url):
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO urls (url) VALUES (?)", (url,))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def open_store(sheet_path=DEFAULT_SHEET_PATH):
+    """Returns the shared store backing `sheet_path`, migrating the CSV on first open."""
+    db_path = os.path.splitext(sheet_path)[0] + '.db'
+    with _stores_lock:
+        store = _stores.get(db_path)
+        if store is None:
+            store = ProcessedUrlStore(db_path, legacy_csv=sheet_path)
+            _stores[db_path] = store
+        return store